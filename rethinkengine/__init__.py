@@ -6,9 +6,16 @@ import fields
 from fields import *
 import errors
 from errors import *
+import indexes
+from indexes import *
+import session
+from session import *
+import cache
+from cache import *
 
 __all__ = [
     list(connection.__all__) + list(document.__all__) +
-    list(fields.__all__) + list(errors.__all__)]
+    list(fields.__all__) + list(errors.__all__) + list(indexes.__all__) +
+    list(session.__all__) + list(cache.__all__)]
 
 __version__ = '0.1.1'
@@ -0,0 +1,114 @@
+from collections import OrderedDict
+
+import copy
+import sys
+import threading
+import time
+
+__all__ = ['BaseCache', 'LRUCache']
+
+
+class BaseCache(object):
+    """Interface of the caches used for primary key lookups.
+
+    A cache is set per document class with ``__cache__``. Keys are
+    (table name, primary key) tuples and values are rows as returned by
+    RethinkDB; a backend storing them out of process has to serialize both.
+    """
+
+    def get(self, key):
+        # The row stored for key, or None
+        raise NotImplementedError
+
+    def get_many(self, keys):
+        # {key: row} of the keys found
+        found = {}
+        for key in keys:
+            row = self.get(key)
+            if row is not None:
+                found[key] = row
+        return found
+
+    def set(self, key, row):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class LRUCache(BaseCache):
+    """In-process cache dropping the least recently used rows.
+
+    Holds at most max_entries rows, and max_bytes of them as estimated with
+    sys.getsizeof() when given. Rows expire ttl seconds after they were
+    stored when ttl is given.
+    """
+
+    def __init__(self, max_entries=1000, max_bytes=None, ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # key -> (row, size, expiry time), the most recently used last
+        self._rows = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._rows.pop(key, None)
+            if entry is None:
+                return None
+            row, size, expires = entry
+            if expires is not None and expires < time.time():
+                self._bytes -= size
+                return None
+            self._rows[key] = entry
+        # Documents modify their lists and dicts in place
+        return copy.deepcopy(row)
+
+    def set(self, key, row):
+        row = copy.deepcopy(row)
+        size = _sizeof(row)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        expires = None if self.ttl is None else time.time() + self.ttl
+        with self._lock:
+            self._pop(key)
+            self._rows[key] = (row, size, expires)
+            self._bytes += size
+            while (len(self._rows) > self.max_entries or
+                   self.max_bytes is not None and
+                   self._bytes > self.max_bytes):
+                self._pop(next(iter(self._rows)))
+
+    def delete(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+            self._bytes = 0
+
+    def _pop(self, key):
+        entry = self._rows.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+
+def _sizeof(value):
+    # Approximate memory use of a row
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for k, v in value.iteritems():
+            size += _sizeof(k) + _sizeof(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            size += _sizeof(v)
+    return size
@@ -1,7 +1,12 @@
 import rethinkdb as r
+import threading
+import time
+
+from contextlib import contextmanager
 from errors import ConnectionError
 
-__all__ = ['connect', 'disconnect', 'get_conn']
+__all__ = ['connect', 'disconnect', 'get_conn', 'get_pool', 'checkout',
+           'ConnectionPool']
 
 DEFAULT_DATABASE_NAME = 'default'
 
@@ -13,7 +18,158 @@ _active_alias = None
 get_alias = lambda d: d or _active_alias or DEFAULT_DATABASE_NAME
 
 
-def connect(db=None, alias=None, host='localhost', port=28015, auth_key=''):
+class ConnectionPool(object):
+    """Thread-safe pool of connections to a single database.
+
+    Connections are checked out with acquire() or the checkout() context
+    manager, and are opened on demand up to max_size. Nested checkouts from
+    the same thread share its connection, so running queries while a cursor
+    is open doesn't take a second one. Idle connections beyond min_size are
+    closed after idle_timeout seconds, and connections that have been idle
+    for health_check_interval seconds are checked with a round trip and
+    reconnected if needed before they are handed out.
+    """
+
+    def __init__(self, host='localhost', port=28015, db=None, auth_key='',
+                 min_size=0, max_size=10, idle_timeout=300,
+                 health_check_interval=30, timeout=None):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError('Invalid pool size %d-%d' % (min_size, max_size))
+        self.host = host
+        self.port = port
+        self.db = db
+        self.auth_key = auth_key
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self._lock = threading.Condition()
+        # (connection, time of release), the most recently used last
+        self._idle = []
+        # Number of open connections, idle or checked out
+        self._size = 0
+        # Thread ident -> [connection, number of nested checkouts]
+        self._in_use = {}
+        self._closed = False
+        # Connection returned by get_conn(), not part of the pool
+        self.shared = self._connect()
+        for i in xrange(min_size):
+            self._idle.append((self._connect(), time.time()))
+            self._size += 1
+
+    def _connect(self):
+        try:
+            return r.connect(host=self.host, db=self.db, port=self.port,
+                             auth_key=self.auth_key)
+        except r.RqlDriverError:
+            raise ConnectionError('Could not connect to %s:%d/%s' %
+                                  (self.host, self.port, self.db))
+
+    def acquire(self):
+        deadline = None if self.timeout is None else \
+            time.time() + self.timeout
+        ident = threading.current_thread().ident
+        with self._lock:
+            if ident in self._in_use:
+                self._in_use[ident][1] += 1
+                return self._in_use[ident][0]
+            while True:
+                if self._closed:
+                    raise ConnectionError('Not connected')
+                self._close_idle()
+                if self._idle:
+                    conn, released = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    conn, released = None, None
+                    self._size += 1
+                    break
+                remaining = None if deadline is None else \
+                    deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise ConnectionError('Timed out waiting for a '
+                                          'connection to %s' % self.db)
+                self._lock.wait(remaining)
+
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif (not conn.is_open() or
+                  time.time() - released > self.health_check_interval and
+                  not self._is_healthy(conn)):
+                conn.reconnect(noreply_wait=False)
+        except Exception as e:
+            self._discard(conn)
+            if isinstance(e, r.RqlDriverError):
+                raise ConnectionError('Could not connect to %s:%d/%s' %
+                                      (self.host, self.port, self.db))
+            raise
+        with self._lock:
+            self._in_use[ident] = [conn, 1]
+        return conn
+
+    def release(self, conn):
+        with self._lock:
+            for ident, checkout in self._in_use.items():
+                if checkout[0] is conn:
+                    checkout[1] -= 1
+                    if checkout[1] > 0:
+                        return
+                    del self._in_use[ident]
+                    break
+            if self._closed or not conn.is_open():
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.time()))
+                self._lock.notify()
+
+    @contextmanager
+    def checkout(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            for conn, released in self._idle:
+                self._discard(conn)
+            self._idle = []
+            self.shared.close()
+            self._lock.notify_all()
+
+    def _is_healthy(self, conn):
+        try:
+            r.expr(1).run(conn)
+        except r.RqlDriverError:
+            return False
+        return True
+
+    def _close_idle(self):
+        # Close connections that have been idle too long, keeping min_size
+        expire = time.time() - self.idle_timeout
+        while (self._idle and self._size > self.min_size and
+               self._idle[0][1] < expire):
+            self._discard(self._idle.pop(0)[0])
+
+    def _discard(self, conn):
+        with self._lock:
+            self._size -= 1
+            self._lock.notify()
+        if conn is not None and conn.is_open():
+            try:
+                conn.close(noreply_wait=False)
+            except r.RqlDriverError:
+                pass
+
+
+def connect(db=None, alias=None, host='localhost', port=28015, auth_key='',
+            **pool_options):
+    # pool_options are passed on to ConnectionPool: min_size, max_size,
+    # idle_timeout, health_check_interval and timeout
     global _connections
     global _active_alias
     # No value for 'db' means _active_alias (last used), or default.
@@ -21,17 +177,14 @@ def connect(db=None, alias=None, host='localhost', port=28015, auth_key=''):
     # If alias isn't provided, use db
     alias = alias or db
     if alias not in _connections:
-        try:
-            _connections[alias] = r.connect(host=host, db=db, port=port,
-                                            auth_key=auth_key)
-        except r.RqlDriverError:
-            raise ConnectionError('Could not connect to %s:%d/%s' %
-                                  (host, port, db))
+        _connections[alias] = ConnectionPool(host=host, port=port, db=db,
+                                             auth_key=auth_key,
+                                             **pool_options)
         if db not in db_list(alias):
             db_create(db, alias)
-        _connections[alias].use(db)
+        _connections[alias].shared.use(db)
         _active_alias = alias
-    return _connections[alias]
+    return _connections[alias].shared
 
 
 def disconnect(alias=None):
@@ -40,30 +193,51 @@ def disconnect(alias=None):
     alias = get_alias(alias)
     if not alias or alias not in _connections:
         raise ConnectionError('Not connected')
-    get_conn(alias=alias).close()
+    _connections[alias].close()
     _active_alias = None
     del _connections[alias]
 
 
-def get_conn(alias=None):
-    global _connections
+def get_pool(alias=None):
     alias = get_alias(alias)
     if alias not in _connections:
         raise ConnectionError('No such connection')
-    return connect(alias=alias)
+    return _connections[alias]
+
+
+def get_conn(alias=None):
+    # Returns the connection shared by all callers of get_conn(). Use
+    # checkout() for a connection of your own, e.g. from multiple threads.
+    conn = get_pool(alias).shared
+    if not conn.is_open():
+        conn.reconnect(noreply_wait=False)
+    return conn
+
+
+def checkout(alias=None):
+    # Context manager that checks a connection out of the pool
+    return get_pool(alias).checkout()
+
+
+def run(query, alias=None, **kwargs):
+    # Runs query on a pooled connection. Cursors are read to the end before
+    # the connection goes back to the pool.
+    with checkout(alias) as conn:
+        result = query.run(conn, **kwargs)
+        if isinstance(result, r.net.Cursor):
+            result = list(result)
+        return result
 
 
 def db_list(alias=None):
-    return r.db_list().run(get_conn(alias))
+    return run(r.db_list(), alias)
 
 
 def db_create(db, alias=None):
     alias = alias or db
-    conn = get_conn(alias)
-    r.db_create(db).run(conn)
+    run(r.db_create(db), alias)
 
 
 def db_drop(db, alias=None):
     alias = alias or db
-    conn = get_conn(alias)
-    r.db_drop(db).run(conn)
\ No newline at end of file
+    run(r.db_drop(db), alias)
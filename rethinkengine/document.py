@@ -1,12 +1,16 @@
+import copy
 import pytz
 import datetime
 from inflector import Inflector
 
 from collections import OrderedDict
 
-from rethinkengine.connection import get_conn
-from rethinkengine.fields import BaseField, ObjectIdField, ReferenceField
+from rethinkengine.connection import run
+from rethinkengine.fields import BaseField, ObjectIdField, ReferenceField, \
+    ListField, DictField
+from rethinkengine.indexes import Index
 from rethinkengine.query_set import QuerySetManager
+from rethinkengine.session import get_session
 from rethinkengine.errors import DoesNotExist, \
     MultipleObjectsReturned, RqlOperationError, ValidationError
 
@@ -15,28 +19,219 @@ import rethinkdb as r
 
 __all__ = ['BaseDocument', 'Document']
 
+def _converter(field, name):
+    # The bound converter method of field, or None if it doesn't convert
+    if (type(field).to_python.im_func is BaseField.to_python.im_func and
+            type(field).to_rethink.im_func is BaseField.to_rethink.im_func):
+        return None
+    return getattr(field, name)
+
+
+class _FieldAttribute(object):
+    # Attribute of a field, kept in _data[key]. Assigning a different value
+    # marks the field as changed.
+
+    def __init__(self, name, key, field):
+        self.name = name
+        self.key = key
+        self.field = field
+
+    def _read(self, instance):
+        return instance._data.get(self.key)
+
+    def _write(self, instance, value):
+        instance._data[self.key] = value
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = self._read(instance)
+        if (value is None and instance._loaded_fields is not None and
+                self.name not in instance._loaded_fields):
+            instance._load_deferred()
+            value = self._read(instance)
+        # Falsy values are kept, only missing values fall back to the default
+        return self.field._default if value is None else value
+
+    def __set__(self, instance, value):
+        #Fix timezone for datetime
+        if isinstance(value, datetime.datetime) and not value.tzinfo:
+            value = pytz.utc.localize(value)
+        current = self._read(instance)
+        if current is None:
+            current = self.field._default
+        if current != value:
+            instance._dirty = True
+            instance._changed_fields.add(self.name)
+            instance._atomic_updates.pop(self.name, None)
+        self._write(instance, value)
+
+
+class _CompactField(_FieldAttribute):
+    # Attribute of a field of a compact document, kept in _values[key]
+
+    def _read(self, instance):
+        return instance._values[self.key]
+
+    def _write(self, instance, value):
+        instance._values[self.key] = value
+
+
+class _CompactData(object):
+    # The values of a compact document as a mapping of _data keys
+
+    __slots__ = ('_doc',)
+
+    def __init__(self, doc):
+        self._doc = doc
+
+    def __getitem__(self, key):
+        return self._doc._values[self._doc._positions[key]]
+
+    def __setitem__(self, key, value):
+        self._doc._values[self._doc._positions[key]] = value
+
+    def __contains__(self, key):
+        return key in self._doc._positions and self[key] is not None
+
+    def get(self, key, default=None):
+        value = self[key] if key in self._doc._positions else None
+        return default if value is None else value
+
+    def items(self):
+        return [(key, self[key]) for key in self._doc._positions
+                if self[key] is not None]
+
+
+class _CompactDocument(object):
+    # Base of documents with __compact__ set. Instances have no __dict__ and
+    # keep field values in a list, indexed by the position of the field.
+    # _data views the list as a mapping, so Document reads and writes rows
+    # through it like through the dict of other documents. The change
+    # tracking set and dict are only created once a field is changed.
+
+    __slots__ = ('_values', '_iter', '_dirty', '_changed_set', '_atomic_dict',
+                 '_loaded_fields', '_snapshot')
+
+    @property
+    def _data(self):
+        return _CompactData(self)
+
+    def _init_data(self):
+        self._values = [None] * len(self._positions)
+
+    @property
+    def _changed_fields(self):
+        if self._changed_set is None:
+            self._changed_set = set()
+        return self._changed_set
+
+    @property
+    def _atomic_updates(self):
+        if self._atomic_dict is None:
+            self._atomic_dict = {}
+        return self._atomic_dict
+
+    def _clear_changes(self):
+        self._changed_set = None
+        self._atomic_dict = None
+
+
 class BaseDocument(type):
     def __new__(mcs, name, bases, attrs):
+        # Compact documents get their storage from _CompactDocument, and
+        # slots so that instances have no __dict__
+        compact = attrs.get('__compact__', any(
+            getattr(base, '__compact__', False) for base in bases))
+        if compact and '__slots__' not in attrs:
+            attrs['__slots__'] = ()
+            if not any(issubclass(base, _CompactDocument) for base in bases):
+                bases = (_CompactDocument,) + bases
+
         new_class = super(BaseDocument, mcs).__new__(mcs, name, bases, attrs)
 
         # If new_class is of type Document, return straight away
         if object in new_class.__bases__:
             return new_class
 
-        # Process schema
+        # Process schema. Fields inherited from another document are found
+        # as its attributes and get new ones, indexing the storage of
+        # new_class.
         fields = sorted(
-            inspect.getmembers(
-                new_class,
-                lambda o: isinstance(o, BaseField)
-            ),
+            [(field_name, getattr(member, 'field', member))
+             for field_name, member in inspect.getmembers(
+                 new_class,
+                 lambda o: isinstance(o, (BaseField, _FieldAttribute)))
+             if field_name != 'id'],
             key=lambda i: i[1]._creation_order)
         new_class._fields = attrs.get('_fields', OrderedDict())
         new_class._fields['id'] = ObjectIdField()
         for field_name, field in fields:
             new_class._fields[field_name] = field
-            delattr(new_class, field_name)
         new_class.objects = QuerySetManager()
 
+        # Keys and converters of every field, so that rows are converted
+        # without looking at the field types. _data_keys maps fields to their
+        # key in _data, _row_keys to their key in stored rows, _to_db to
+        # (key in _data, key in the row, to_rethink) and _from_row row keys
+        # to (key in _data, to_python, reference field name). Converters
+        # that return the value unchanged are None.
+        pk = new_class.__primary_key__
+        new_class._data_keys = {}
+        new_class._row_keys = {}
+        new_class._to_db = {}
+        new_class._from_row = {}
+        for field_name, field in new_class._fields.items():
+            data_key = db_key = field_name
+            reference = None
+            if isinstance(field, ReferenceField):
+                data_key = db_key = field_name + '_id'
+                reference = field_name
+            elif field_name == 'id':
+                db_key = pk
+            new_class._data_keys[field_name] = data_key
+            new_class._row_keys[field_name] = db_key
+            new_class._to_db[field_name] = (data_key, db_key,
+                                            _converter(field, 'to_rethink'))
+            # The primary key is always stored as 'id' by _set_row()
+            if field_name != 'id':
+                new_class._from_row[db_key] = (data_key,
+                                               _converter(field, 'to_python'),
+                                               reference)
+
+        # (name, is_valid, required) of the fields checked by validate_many()
+        new_class._validators = [
+            (field_name, field.is_valid, getattr(field, '_required', False))
+            for field_name, field in new_class._fields.items()
+            if field_name != 'id' or pk == 'id']
+
+        # (name, key in _data) of the fields that can be changed in place
+        new_class._containers = [
+            (field_name, new_class._data_keys[field_name])
+            for field_name, field in new_class._fields.items()
+            if isinstance(field, (ListField, DictField))]
+
+        # Replace the fields with attributes reading _data, or _values for
+        # compact documents
+        new_class._positions = {}
+        for field_name, field in new_class._fields.items():
+            data_key = new_class._data_keys[field_name]
+            if compact:
+                new_class._positions[data_key] = len(new_class._positions)
+                attribute = _CompactField(
+                    field_name, new_class._positions[data_key], field)
+            else:
+                attribute = _FieldAttribute(field_name, data_key, field)
+            setattr(new_class, field_name, attribute)
+
+        # Declared indexes, strings are shorthand for single field indexes
+        new_class._indexes = OrderedDict()
+        for index in new_class.__indexes__ or ():
+            if not isinstance(index, Index):
+                index = Index(index)
+            new_class._indexes[index.name] = index
+        new_class._index_cache = None
+
         # Merge exceptions
         classes_to_merge = (DoesNotExist, MultipleObjectsReturned)
         for c in classes_to_merge:
@@ -55,33 +250,46 @@ class Document(object):
     __table_name__ = None
     __primary_key__ = 'id'
     __order_by__ = None
+    # Secondary indexes as Index objects or field names. When None, indexes
+    # named after a field are looked up with index_list() on first use.
+    __indexes__ = None
+    # Cache of rows by primary key, e.g. LRUCache(ttl=60)
+    __cache__ = None
+    # Compact documents use less memory, for loading many at once. They
+    # have no __dict__, so only fields can be set on them.
+    __compact__ = False
+
+    __slots__ = ()
 
     def __init__(self, **kwargs):
         super(Document, self).__init__()
-        self.__dict__['_data'] = {}
-        self.__dict__['_iter'] = None
-        self.__dict__['_dirty'] = True
+        self._init_data()
+        self._iter = None
+        self._dirty = True
+        self._clear_changes()
+        # Names of the fields fetched by QuerySet.only() or defer(), None
+        # when all fields are loaded
+        self._loaded_fields = None
+        # Copies of the list and dict fields as last loaded or saved, None
+        # when the document wasn't loaded from the database
+        self._snapshot = None
         for name, value in kwargs.items():
             setattr(self, name, value)
 
-    def __setattr__(self, key, value):
-        field = self._fields.get(key, None)
-        if field is not None:
-            #Fix timezone for datetime
-            if isinstance(value, datetime.datetime) and not value.tzinfo:
-                value = pytz.utc.localize(value)
-            if self._get_value(key) != value:
-                self._dirty = True
-            #Add _id if field if ReferenceField
-            if isinstance(self._fields.get(key), ReferenceField):
-                key += '_id'
-            self._data[key] = value
-        super(Document, self).__setattr__(key, value)
+    def _init_data(self):
+        self.__dict__['_data'] = {}
+
+    def _clear_changes(self):
+        self._changed_fields = set()
+        self._atomic_updates = {}
 
     def __getattr__(self, key):
-        field = self._fields.get(key)
-        if field:
-            return self._get_value(key)
+        # <reference>_id returns the referenced primary key without fetching
+        # the referenced document
+        if key.endswith('_id'):
+            field = self._fields.get(key[:-3])
+            if isinstance(field, ReferenceField):
+                return field.to_rethink(self._get_value(key[:-3]))
         raise AttributeError
 
     def __str__(self):
@@ -92,17 +300,51 @@ class Document(object):
 
     def next(self):
         if not self._iter:
-            self.__dict__['_iter'] = iter(self._fields)
+            self._iter = iter(self._fields)
         return self._iter.next()
 
     def __repr__(self):
         return '<%s object>' % self.__class__.__name__
 
     def items(self):
-        return [(k, self._get_value(k)) for k in self._fields]
+        return [(k, getattr(self, k)) for k in self._fields]
+
+    def increment(self, name, amount=1):
+        # Adds amount to a numeric field, saved as r.row[name] + amount
+        self._atomic_update(
+            name, (self._get_value(name) or 0) + amount,
+            lambda stored: stored + amount, 0)
+
+    def append(self, name, *values):
+        # Appends values to a list field, saved without sending the list
+        self._atomic_update(
+            name, list(self._get_value(name) or []) + list(values),
+            lambda stored: stored.union(list(values)), [])
+
+    def remove(self, name, *values):
+        # Removes all occurrences of values from a list field, saved without
+        # sending the list
+        self._atomic_update(
+            name, [v for v in self._get_value(name) or [] if v not in values],
+            lambda stored: stored.difference(list(values)), [])
+
+    def _atomic_update(self, name, value, update, default):
+        # Sets the local value and queues update, a function of the stored
+        # value, for the next save(). Falls back to sending the value itself
+        # when the document is new or the field has been assigned.
+        if name not in self._fields:
+            raise AttributeError(name)
+        self._data[name] = value
+        self._dirty = True
+        if self._get_value('id') and name not in self._changed_fields:
+            stored = self._atomic_updates.get(name)
+            if stored is None:
+                stored = r.row[name].default(default)
+            self._atomic_updates[name] = update(stored)
 
     @classmethod
     def index_create(cls, name, fields=None, mutil=False):
+        cls._index_cache = None
 
         if fields is None:
             fields = []
@@ -111,69 +353,193 @@ class Document(object):
 
         table = r.table(cls.__table_name__)
         if len(fields) is 0 and not mutil:
-            return table.index_create(name).run(get_conn())
+            return run(table.index_create(name))
 
         if len(fields) > 0:
-            return table.index_create(name, [r.row[x] for x in fields]).run(get_conn())
+            return run(table.index_create(name, [r.row[x] for x in fields]))
 
         if mutil:
-            return table.index_create(name, multi=True).run(get_conn())
+            return run(table.index_create(name, multi=True))
 
         return False
 
     @classmethod
     def index_drop(cls, name):
-        return r.table(cls.__table_name__).index_drop(name).run(get_conn())
+        cls._index_cache = None
+        return run(r.table(cls.__table_name__).index_drop(name))
 
     @classmethod
     def index_list(cls):
-        return r.table(cls.__table_name__).index_list().run(get_conn())
+        return run(r.table(cls.__table_name__).index_list())
 
     @classmethod
     def index_wait(cls, name):
-        return r.table(cls.__table_name__).index_wait(name).run(get_conn())
+        cls._index_cache = None
+        return run(r.table(cls.__table_name__).index_wait(name))
 
     @classmethod
     def index_status(cls, name):
-        return r.table(cls.__table_name__).index_status(name).run(get_conn())
+        return run(r.table(cls.__table_name__).index_status(name))
+
+    @classmethod
+    def sync_indexes(cls):
+        # Create the declared indexes that don't exist yet and wait for them
+        # to be ready, then read the indexes used by the query planner.
+        # Returns the names of the created indexes.
+        table = r.table(cls.__table_name__)
+        existing = set(cls.index_list())
+        created = []
+        for name, index in cls._indexes.items():
+            if name not in existing:
+                run(index.create(table))
+                created.append(name)
+        if created:
+            run(table.index_wait(*created))
+        cls._index_cache = None
+        cls._get_indexes()
+        return created
+
+    @classmethod
+    def _get_indexes(cls):
+        # Secondary indexes usable by the query planner, as a mapping of index
+        # name to the indexed fields. Declared indexes are only used once
+        # they exist, i.e. after sync_indexes(). Without declarations, the
+        # ready single value indexes named after a field are used.
+        if cls._index_cache is None:
+            if cls.__indexes__ is not None:
+                existing = set(cls.index_list())
+                cls._index_cache = dict(
+                    (name, index.fields) for name, index in
+                    cls._indexes.items()
+                    if index.is_simple and name in existing)
+            else:
+                status = run(r.table(cls.__table_name__).index_status())
+                cls._index_cache = dict(
+                    (index['index'], (index['index'],)) for index in status
+                    if index['index'] in cls._fields and index['ready'] and
+                    not index['multi'] and not index['geo'])
+        return cls._index_cache
 
     @classmethod
     def table_create(cls, if_not_exists=True):
+        cls._index_cache = None
+        if cls.__cache__ is not None:
+            cls.__cache__.clear()
         if (
             if_not_exists and
-            (cls.__table_name__ in r.table_list().run(get_conn()))
+            (cls.__table_name__ in run(r.table_list()))
         ):
             return
 
-        return r.table_create(
+        return run(r.table_create(
             cls.__table_name__,
             primary_key=cls.__primary_key__
-        ).run(get_conn())
+        ))
 
     @classmethod
     def table_drop(cls):
-        return r.table_drop(cls.__table_name__).run(get_conn())
+        cls._index_cache = None
+        if cls.__cache__ is not None:
+            cls.__cache__.clear()
+        return run(r.table_drop(cls.__table_name__))
 
     def validate(self):
-        data = [(name, field, getattr(self, name)) for name, field in
-                self._fields.items()]
-        for name, field, value in data:
-            if name == 'id' and self.__primary_key__ != 'id':
-                continue
-            if isinstance(field, ObjectIdField) and value is None:
-                continue
+        errors = self.validate_many([self])
+        if errors:
+            raise ValidationError(errors[0][2])
+
+    @classmethod
+    def validate_many(cls, docs):
+        # Validates documents one field at a time. Returns the errors as
+        # (index of the document, field name, message), by document.
+        errors = []
+        for name, is_valid, required in cls._validators:
+            key = cls._data_keys[name]
+            default = cls._fields[name]._default
+            for index, doc in enumerate(docs):
+                if (doc._loaded_fields is not None and
+                        name not in doc._loaded_fields):
+                    continue
+                # The stored value, so that falsy values are checked as is
+                value = doc._data.get(key)
+                if value is None:
+                    value = default
+                # Only required fields can be invalid when empty
+                if value is None and not required:
+                    continue
+                if not is_valid(value):
+                    message = 'Field %s: %s is of wrong type %s' % (
+                        name, cls._fields[name].__class__.__name__,
+                        type(value))
+                    errors.append((index, name, message))
+        errors.sort(key=lambda error: error[0])
+        return errors
 
-            if not field.is_valid(value):
-                raise ValidationError('Field %s: %s is of wrong type %s' %
-                                      (name, field.__class__.__name__, type(value)))
     @classmethod
     def get_all(cls, *args, **kwargs):
-        result = r.table(cls.__table_name__).get_all(*args, **kwargs).run(get_conn())
-        return [cls(**o) for o in result]
+        cache = cls.__cache__
+        if cache is None or kwargs:
+            result = run(r.table(cls.__table_name__).get_all(*args, **kwargs))
+            return [cls._from_db(o) for o in result]
+        # Primary key lookup, only fetch the rows that aren't cached
+        cached = cache.get_many([cls._cache_key(pk) for pk in set(args)])
+        result = cached.values()
+        missing = [pk for pk in set(args) if cls._cache_key(pk) not in cached]
+        if missing:
+            for row in run(r.table(cls.__table_name__).get_all(*missing)):
+                cache.set(cls._cache_key(row[cls.__primary_key__]), row)
+                result.append(row)
+        return [cls._from_db(o) for o in result]
 
-    def save(self):
-        if not self._dirty:
-            return True
+    @classmethod
+    def _cache_key(cls, pk):
+        return cls.__table_name__, pk
+
+    @classmethod
+    def _from_db(cls, row, related=None, loaded=None):
+        # Build a document from a row as returned by RethinkDB. `related` maps
+        # ReferenceField names to {pk: document} of already resolved documents,
+        # `loaded` are the names of the fields in the row if not all of them.
+        # Within a session, a document loaded before is returned as is.
+        session = get_session()
+        if session is not None:
+            doc = session.get(cls, row.get(cls.__primary_key__))
+            if doc is not None:
+                return doc
+        doc = cls()
+        doc._dirty = False
+        doc._loaded_fields = loaded
+        doc._set_row(row, related)
+        doc._take_snapshot()
+
+        if session is not None:
+            session.add(doc)
+        return doc
+
+    def _set_row(self, row, related=None):
+        # Bypass __setattr__ to prevent _dirty from being set to True
+        data = self._data
+        from_row = self._from_row
+        for key, value in row.iteritems():
+            if key not in from_row:
+                continue
+            data_key, to_python, reference = from_row[key]
+            if reference is not None and related and reference in related:
+                value = related[reference].get(value, value)
+            data[data_key] = value if to_python is None else to_python(value)
+        if self.__primary_key__ in row:
+            data['id'] = row[self.__primary_key__]
+
+    def save(self, upsert=False):
+        # With upsert, the document is inserted, or its changed fields are
+        # merged into the stored document with the same primary key, in a
+        # single query, or two when atomic updates are pending
+        if self._dirty or self._mutated_fields():
+            self._save(upsert)
+        return True
+
+    def _save(self, upsert=False):
+        # Returns the result of the write query
         self.validate()
 
         is_update = False
@@ -186,21 +552,44 @@ class Document(object):
         except AttributeError:
             pass
 
-        doc = self._doc
         table = r.table(self.__table_name__)
 
-        if is_update:
-            # TODO: implement atomic updates instead of updating entire doc
-            result = table.get(self.id).update(doc).run(get_conn())
+        if upsert:
+            # Only the changed fields are sent so the others aren't
+            # overwritten with the local defaults
+            doc = self._build_doc(['id'] + list(self._changed_fields) +
+                                  self._mutated_fields())
+            result = run(table.insert(doc, conflict='update',
+                                      return_changes=True))
+            if self._atomic_updates and not result.get('errors'):
+                # r.row is not defined in an insert, so the atomic updates
+                # are applied to the stored document afterwards
+                updated = run(table.get(self._get_value('id')).update(
+                    self._atomic_updates, return_changes=True))
+                if updated.get('changes'):
+                    result['changes'] = updated['changes']
+        elif is_update:
+            result = run(table.get(self.id).update(self._changes))
         else:
-            result = table.insert(doc).run(get_conn())
+            result = run(table.insert(self._doc))
 
         if result.get('errors', False) == 1:
             raise RqlOperationError(result['first_error'])
+        if upsert and result.get('changes'):
+            # Take the fields of the stored document that weren't sent
+            self._set_row(result['changes'][0]['new_val'])
+            self._loaded_fields = None
+        if (upsert or is_update) and self.__cache__ is not None:
+            self.__cache__.delete(self._cache_key(self._get_value('id')))
 
         self._dirty = False
+        self._clear_changes()
+        self._take_snapshot()
         if 'generated_keys' in result:
             self._data['id'] = result['generated_keys'][0]
+        session = get_session()
+        if session is not None:
+            session.add(self)
 
         try:
             if is_update:
@@ -210,7 +599,7 @@ class Document(object):
         except AttributeError:
             pass
 
-        return True
+        return result
 
     def delete(self):
         table = r.table(self.__table_name__)
@@ -219,7 +608,12 @@ class Document(object):
                 self._pre_delete()
             except AttributeError:
                 pass
-            result = table.get(self._get_value('id')).delete().run(get_conn())
+            result = run(table.get(self._get_value('id')).delete())
+            if self.__cache__ is not None:
+                self.__cache__.delete(self._cache_key(self._get_value('id')))
+            session = get_session()
+            if session is not None:
+                session.remove(self)
             try:
                 self._post_delete()
             except AttributeError:
@@ -227,11 +621,53 @@ class Document(object):
 
             return result
 
+    def _is_loaded(self, name):
+        return self._loaded_fields is None or name in self._loaded_fields
+
+    def _load_deferred(self):
+        # Fetch the fields left out by QuerySet.only() or defer(), keeping the
+        # values assigned in the meantime
+        missing = [name for name in self._fields if not self._is_loaded(name)]
+        qs = self.objects.filter(id=self._get_value('id')).only(*missing)
+        row = qs.first()
+        if row is None:
+            message = 'Query did not match any %s objects' % \
+                self.__class__.__name__
+            raise self.DoesNotExist(message)
+        for name in missing:
+            key = self._data_keys[name]
+            if name not in self._changed_fields and key in row._data:
+                self._data[key] = row._data[key]
+        self._loaded_fields = None
+        self._take_snapshot(missing)
+
+    def _take_snapshot(self, names=None):
+        # Copies the given, or all loaded, list and dict fields to tell
+        # later whether they were changed in place
+        if not self._containers:
+            return
+        if self._snapshot is None:
+            self._snapshot = {}
+        for name, key in self._containers:
+            if (self._is_loaded(name) if names is None
+                    else name in names):
+                self._snapshot[name] = copy.deepcopy(self._data.get(key))
+
+    def _mutated_fields(self):
+        # Names of the loaded list and dict fields changed in place since
+        # they were loaded or saved. Without a snapshot all of them are
+        # assumed to be changed.
+        snapshot = self._snapshot
+        return [name for name, key in self._containers
+                if self._is_loaded(name) and
+                name not in self._changed_fields and
+                name not in self._atomic_updates and
+                (snapshot is None or name not in snapshot or
+                 self._data.get(key) != snapshot[name])]
+
     def _get_value(self, field_name):
-        key = field_name
-        if isinstance(self._fields[field_name], ReferenceField):
-            key += '_id'
-        return self._data.get(key) or self._fields[field_name]._default
+        return (self._data.get(self._data_keys[field_name]) or
+                self._fields[field_name]._default)
 
     def _to_python(self, field_name, value):
         if field_name in self._fields:
@@ -247,15 +683,30 @@ class Document(object):
 
     @property
     def _doc(self):
+        return self._build_doc(self._fields)
+
+    @property
+    def _changes(self):
+        # The fields to send on update: the assigned ones, and lists and dicts
+        # modified in place. Atomic updates are sent as ReQL expressions.
+        doc = self._build_doc(list(self._changed_fields) +
+                              self._mutated_fields())
+        doc.pop(self.__primary_key__, None)
+        doc.update(self._atomic_updates)
+        return doc
+
+    def _build_doc(self, names):
         doc = {}
-        for name, field_obj in self._fields.items():
-            key = self.__primary_key__ if name == 'id' else name
-            value = self._get_value(name)
-            if key == self.__primary_key__ and value is None:
+        data = self._data
+        pk = self.__primary_key__
+        for name in names:
+            data_key, key, to_rethink = self._to_db[name]
+            value = data.get(data_key) or self._fields[name]._default
+            if key == pk and value is None:
                 continue
-            if isinstance(field_obj, ReferenceField):
-                key += '_id'
-
-            doc[key] = None if not value else field_obj.to_rethink(value)
+            if not value:
+                doc[key] = None
+            else:
+                doc[key] = value if to_rethink is None else to_rethink(value)
 
         return doc
@@ -1,11 +1,12 @@
 import re
 import datetime
 import pytz
+import rethinkdb as r
 
 __all__ = ['BaseField', 'ObjectIdField', 'StringField',
            'IntegerField', 'FloatField', 'ListField',
            'DictField', 'BooleanField', 'DateField',
-           'DateTimeField', 'ReferenceField']
+           'DateTimeField', 'ReferenceField', 'LazyReference']
 
 
 class BaseField(object):
@@ -31,47 +32,109 @@ class BaseField(object):
             return True
         return False
 
+    def rethink_check(self, value):
+        # ReQL expression that is true when value, a ReQL term, is valid for
+        # the field, or None when any value is
+        checks = self._rethink_checks(value)
+        if self._required:
+            return r.and_(value.ne(None), *checks)
+        if checks:
+            return r.or_(value.eq(None), r.and_(*checks))
+        return None
+
+    def _rethink_checks(self, value):
+        # Checks of a value that isn't None
+        return []
+
 
 class ObjectIdField(BaseField):
-    rx = r'^[0-9a-f]{8}\-[0-9a-f]{4}\-[0-9a-f]{4}\-[0-9a-f]{4}\-[0-9a-f]{12}$'
+    rx = re.compile(
+        r'^[0-9a-f]{8}\-[0-9a-f]{4}\-[0-9a-f]{4}\-[0-9a-f]{4}\-[0-9a-f]{12}$')
 
     def __init__(self):
         # PrimaryKeyField.__init__ doesn't accept any arguments
+        self._required = False
         self._default = None
 
     def is_valid(self, value):
-        return isinstance(value, basestring) and bool(re.match(self.rx, value))
+        return isinstance(value, basestring) and bool(self.rx.match(value))
+
+    def _rethink_checks(self, value):
+        return [value.type_of().eq('STRING')]
 
 
 class StringField(BaseField):
+    def __init__(self, regex=None, **kwargs):
+        # Values have to contain a match of regex
+        super(StringField, self).__init__(**kwargs)
+        self._regex = regex
+        self._rx = re.compile(regex) if regex is not None else None
+
     def is_valid(self, value):
         if super(StringField, self).is_valid(value) is True:
             return True
-        return isinstance(value, basestring)
+        return isinstance(value, basestring) and \
+            (self._rx is None or bool(self._rx.search(value)))
+
+    def _rethink_checks(self, value):
+        checks = [value.type_of().eq('STRING')]
+        if self._regex is not None:
+            checks.append(value.match(self._regex).ne(None))
+        return checks
+
+
+class _NumberField(BaseField):
+    def __init__(self, min_value=None, max_value=None, **kwargs):
+        super(_NumberField, self).__init__(**kwargs)
+        self._min_value = min_value
+        self._max_value = max_value
 
+    def _in_range(self, value):
+        return ((self._min_value is None or value >= self._min_value) and
+                (self._max_value is None or value <= self._max_value))
 
-class IntegerField(BaseField):
+    def _rethink_checks(self, value):
+        checks = [value.type_of().eq('NUMBER')]
+        if self._min_value is not None:
+            checks.append(value.ge(self._min_value))
+        if self._max_value is not None:
+            checks.append(value.le(self._max_value))
+        return checks
+
+
+class IntegerField(_NumberField):
     def is_valid(self, value):
         if super(IntegerField, self).is_valid(value) is True:
             return True
-        return isinstance(value, (int, long))
+        return isinstance(value, (int, long)) and self._in_range(value)
 
+    def _rethink_checks(self, value):
+        checks = super(IntegerField, self)._rethink_checks(value)
+        checks.insert(1, value.floor().eq(value))
+        return checks
 
-class FloatField(BaseField):
+
+class FloatField(_NumberField):
     def is_valid(self, value):
+        # Any number, like the server check; stored numbers don't keep
+        # whether they were integers
         if super(FloatField, self).is_valid(value) is True:
             return True
-        return isinstance(value, (float))
+        return isinstance(value, (int, long, float)) and \
+            not isinstance(value, bool) and self._in_range(value)
 
 
 class ListField(BaseField):
     _element_type = None
+    # Instance of _element_type validating the elements
+    _element_field = None
 
     def __init__(self, element_type=None, **kwargs):
         super(ListField, self).__init__(**kwargs)
         if element_type:
             if issubclass(element_type, BaseField):
                 self._element_type = element_type
+                self._element_field = element_type()
             else:
                 raise TypeError('element_type must be instance of BaseField')
 
@@ -81,15 +144,25 @@ class ListField(BaseField):
         valid = isinstance(value, (list, tuple))
         if not valid:
             return False
-        if self._element_type:
+        if self._element_field:
+            is_valid = self._element_field.is_valid
             for elem in value:
-                if not self._element_type().is_valid(elem):
+                if not is_valid(elem):
                     return False
         return True
 
     def to_python(self, value):
         return value or []
 
+    def _rethink_checks(self, value):
+        checks = [value.type_of().eq('ARRAY')]
+        if self._element_field:
+            check = self._element_field.rethink_check
+            if check(r.expr(None)) is not None:
+                checks.append(value.filter(
+                    lambda elem: check(elem).not_()).is_empty())
+        return checks
+
 
 class DictField(BaseField):
     def is_valid(self, value):
@@ -100,6 +173,9 @@ class DictField(BaseField):
     def to_python(self, value):
         return value or {}
 
+    def _rethink_checks(self, value):
+        return [value.type_of().eq('OBJECT')]
+
 
 class BooleanField(BaseField):
     def is_valid(self, value):
@@ -107,6 +183,9 @@ class BooleanField(BaseField):
             return True
         return isinstance(value, bool)
 
+    def _rethink_checks(self, value):
+        return [value.type_of().eq('BOOL')]
+
 
 class DateField(BaseField):
     def to_python(self, value):
@@ -125,11 +204,18 @@ class DateField(BaseField):
     def is_valid(self, value):
         return (value is None) or (isinstance(value, datetime.date))
 
+    def _rethink_checks(self, value):
+        # Stored as YYYY-MM-DD
+        return [value.type_of().eq('STRING')]
+
 
 class DateTimeField(BaseField):
     def is_valid(self, value):
         return (value is None) or (isinstance(value, datetime.datetime))
 
+    def _rethink_checks(self, value):
+        return [value.type_of().eq('PTYPE<TIME>')]
+
     def to_rethink(self, value):
         if isinstance(value, datetime.datetime):
             if not value.tzinfo:
@@ -139,15 +225,50 @@ class DateTimeField(BaseField):
             return None
 
 
+class LazyReference(object):
+    """Stands in for a referenced document until one of its attributes is
+    accessed, at which point the document is fetched once and kept."""
+
+    def __init__(self, document_type, pk):
+        self.__dict__['_document_type'] = document_type
+        self.__dict__['_document'] = None
+        self.__dict__['id'] = pk
+
+    def fetch(self):
+        if self._document is None:
+            self.__dict__['_document'] = \
+                self._document_type.objects.get(id=self.id)
+        return self._document
+
+    def __getattr__(self, key):
+        return getattr(self.fetch(), key)
+
+    def __setattr__(self, key, value):
+        setattr(self.fetch(), key, value)
+
+    def __eq__(self, other):
+        if isinstance(other, (LazyReference, self._document_type)):
+            return self.id == other.id
+        return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return '<LazyReference %s(%s)>' % (self._document_type.__name__,
+                                           self.id)
+
+
 class ReferenceField(BaseField):
 
-    def __init__(self, document_type, **kwargs):
+    def __init__(self, document_type, lazy=False, **kwargs):
         #TODO: Need param document_type is string
         from document import Document
         if not issubclass(document_type, Document):
                 raise ValueError('Argument to ReferenceField constructor must be a subclass of '
                                  'Document class')
         self.document_type = document_type
+        self._lazy = lazy
         super(ReferenceField, self).__init__(**kwargs)
 
     def is_valid(self, value):
@@ -157,10 +278,15 @@ class ReferenceField(BaseField):
         return flag
 
     def to_python(self, value):
-        return value if isinstance(value, self.document_type) else self.document_type.objects.get(id=value)
+        if value is None or isinstance(value, (self.document_type,
+                                               LazyReference)):
+            return value
+        if self._lazy:
+            return LazyReference(self.document_type, value)
+        return self.document_type.objects.get(id=value)
 
     def to_rethink(self, value):
-        if isinstance(value, self.document_type):
+        if isinstance(value, (self.document_type, LazyReference)):
             return value.id
         elif value:
             return value
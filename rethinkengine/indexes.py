@@ -0,0 +1,42 @@
+import rethinkdb as r
+
+__all__ = ['Index']
+
+
+class Index(object):
+    """Secondary index declared in Document.__indexes__.
+
+    Without fields or func the index covers the field with the same name.
+    Several fields make a compound index, func is any ReQL function of the
+    row, and multi creates a multi index over the elements of a list.
+    """
+
+    def __init__(self, name, fields=None, multi=False, func=None):
+        if fields is None and func is None:
+            fields = [name]
+        if fields and func is not None:
+            raise ValueError('Index takes either fields or func, not both')
+        self.name = name
+        self.fields = tuple(fields or ())
+        self.multi = multi
+        self.func = func
+
+    def __repr__(self):
+        return '<Index %s>' % self.name
+
+    @property
+    def is_simple(self):
+        # Whether queries on the indexed fields can be answered by the index
+        return bool(self.fields) and not self.multi
+
+    def create(self, table):
+        # Returns the index_create query for the given table
+        if self.func is not None:
+            return table.index_create(self.name, self.func, multi=self.multi)
+        if self.fields == (self.name,):
+            return table.index_create(self.name, multi=self.multi)
+        if len(self.fields) == 1:
+            return table.index_create(self.name, r.row[self.fields[0]],
+                                      multi=self.multi)
+        return table.index_create(self.name, [r.row[f] for f in self.fields],
+                                  multi=self.multi)
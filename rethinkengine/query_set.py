@@ -1,25 +1,74 @@
-from rethinkengine.connection import get_conn
-from rethinkengine.fields import ObjectIdField
-from rethinkengine.errors import InvalidQueryError, DoesNotExist
+from rethinkengine.connection import get_pool, run
+from rethinkengine.fields import ReferenceField
+from rethinkengine.session import get_session
+from rethinkengine.errors import InvalidQueryError, DoesNotExist, \
+    RqlOperationError, ValidationError, ConnectionError
 
+from collections import deque, namedtuple
+from itertools import islice
+
+import Queue
 import rethinkdb as r
+import sys
+import threading
+import time
 
-__all__ = ['QuerySet', 'QuerySetManager']
+__all__ = ['QuerySet', 'GroupedQuerySet', 'ChangeEvent', 'QuerySetManager']
 
 
 REPR_SIZE = 20
 
+# Number of rows read from the cursor at once when references are resolved
+# through select_related()
+RELATED_BATCH_SIZE = 100
+
+# Number of rows per batch read by QuerySet.iterator()
+ITERATOR_BATCH_SIZE = 1000
+
+# Number of documents per insert query of QuerySet.bulk_insert()
+BULK_INSERT_CHUNK_SIZE = 200
+
+# Seconds to wait before reopening a changefeed after losing the connection
+CHANGES_RECONNECT_DELAY = 1
+
+
+# Operators that can be appended to a field name in filter(), as in id__in
+RANGE_OPERATORS = ('gt', 'gte', 'lt', 'lte')
+LOOKUP_OPERATORS = ('in',) + RANGE_OPERATORS
+
+
+class ChangeEvent(namedtuple('ChangeEvent', ['old', 'new'])):
+    # A change of a document as (old, new) documents. type is one of
+    # 'initial', 'insert', 'update' or 'delete'.
+
+    def __new__(cls, old, new, kind):
+        event = super(ChangeEvent, cls).__new__(cls, old, new)
+        event.type = kind
+        return event
+
 
 class QuerySet(object):
     def __init__(self, document):
         self._document = document
         self._filter = {}
+        self._filter_funcs = []
         self._limit = None
         self._skip = None
         self._count = False
         self._order_by = None
+        self._select_related = ()
+        self._only = None
+        self._defer = ()
+        # (mode, fields, convert) when rows are returned instead of documents
+        self._values = None
+        # Results of the first full iteration, reused by len(), bool(),
+        # indexing and further iterations
+        self._result_cache = None
         self._cursor_obj = None
         self._cursor_iter = None
+        # (pool, connection, cursor) while a cursor holds a connection
+        self._cursor_handle = None
+        self._result_buffer = deque()
         self._iter_index = 0
 
     @property
@@ -28,109 +77,652 @@ class QuerySet(object):
             self._build_cursor_obj()
         return self._cursor_iter
 
-    def _build_cursor_obj(self):
-        self._cursor_obj = r.table(self._document.__table_name__)
-        if self._filter:
-            self._cursor_obj = self._cursor_obj.filter(self._filter)
+    @property
+    def query(self):
+        # The compiled ReQL query, e.g. to run on a connection of your own
+        # using one of the driver's asynchronous loop types. Only uses the
+        # secondary indexes already read, e.g. by sync_indexes(), so that
+        # building it never queries the database.
+        return self._build_query(read_indexes=False)
 
-        order_by = self._order_by or self._document.__order_by__
-        if order_by:
-            order_by_r = []
-            for field in order_by:
-                if field.startswith('-'):
-                    order_by_r.append(r.desc(field[1:]))
-                else:
-                    order_by_r.append(r.asc(field))
-            self._cursor_obj = self._cursor_obj.order_by(*order_by_r)
+    def hydrate(self, rows):
+        # Documents for the rows returned by running query yourself.
+        # select_related() and eager ReferenceFields still query through the
+        # connection pool, use lazy references on asynchronous loops.
+        return self._hydrate_batch(list(rows))
+
+    def _build_query(self, projection=True, ordered=True, read_indexes=True):
+        query = r.table(self._document.__table_name__)
+        criteria = dict(self._filter)
+        order_by = None
+        if ordered:
+            order_by = self._order_by or self._document.__order_by__
+
+        # Lookups on the primary key are served by the primary index
+        pk = self._document.__primary_key__
+        index_order = False
+        if pk in criteria:
+            query = query.get_all(criteria.pop(pk))
+        elif pk + '__in' in criteria:
+            pks = criteria.pop(pk + '__in')
+            query = query.get_all(*pks) if pks else query.limit(0)
+        elif criteria or order_by:
+            query, index_order = self._select_index(query, criteria, order_by,
+                                                    read_indexes)
+
+        query = self._build_filter(query, criteria)
+        for func in self._filter_funcs:
+            query = query.filter(func)
+
+        if order_by and not index_order:
+            query = query.order_by(*[_order_term(f) for f in order_by])
 
         if self._skip:
-            self._cursor_obj = self._cursor_obj.skip(self._skip)
+            query = query.skip(self._skip)
 
-        if self._limit:
-            self._cursor_obj = self._cursor_obj.limit(self._limit)
+        if self._limit is not None:
+            query = query.limit(self._limit)
 
+        if projection:
+            query = self._project(query)
+
+        return query
+
+    def _build_selection(self):
+        # The matching documents as a selection to count, aggregate, update
+        # or delete, ordered only when the order decides which ones match
+        ordered = bool(self._skip) or self._limit is not None
+        return self._build_query(projection=False, ordered=ordered)
+
+    def _project(self, query):
+        if self._values is not None and self._values[1] is not None:
+            return query.pluck(*self._db_keys(self._values[1]))
+        elif self._only is not None:
+            return query.pluck(*self._db_keys(self._loaded_fields()))
+        elif self._defer:
+            return query.without(*self._db_keys(self._defer))
+        return query
+
+    def _loaded_fields(self):
+        # Names of the fields fetched by the query, None for all fields
+        if self._only is None and not self._defer:
+            return None
+        names = set(self._document._fields)
+        if self._only is not None:
+            names = set(self._only)
+            names.update(['id', self._document.__primary_key__])
+        return names.difference(self._defer)
+
+    def _db_keys(self, names):
+        # Keys under which the given fields are stored
+        return [self._document._row_keys[name] for name in names]
+
+    def _select_index(self, query, criteria, order_by, read_indexes=True):
+        # Rewrites the table query to use a secondary index for one of the
+        # criteria, removing the criteria it covers. Returns the new query
+        # and whether it is already sorted by order_by.
+        if read_indexes:
+            all_indexes = self._document._get_indexes()
+        else:
+            all_indexes = self._document._index_cache or {}
+        indexes = dict((fields[0], name) for name, fields in
+                       all_indexes.items() if len(fields) == 1)
+        indexes[self._document.__primary_key__] = \
+            self._document.__primary_key__
+        order_field = None
+        if order_by and len(order_by) == 1:
+            order_field = order_by[0].lstrip('-')
+
+        # Compound indexes whose fields are all compared for equality,
+        # the one covering the most criteria wins. Secondary indexes don't
+        # store None, lookups of None are left to the filter.
+        compound = [(len(fields), name, fields) for name, fields in
+                    all_indexes.items() if len(fields) > 1 and
+                    all(criteria.get(f) is not None for f in fields)]
+        if compound:
+            _, name, fields = max(compound)
+            values = [criteria.pop(f) for f in fields]
+            return query.get_all(values, index=name), False
+
+        # Equality and in lookups become get_all()
+        for key in criteria.keys():
+            field, op = _split_lookup(key)
+            if op in (None, 'in') and field in indexes:
+                values = criteria[key]
+                if op is None:
+                    values = [values]
+                if None in values:
+                    continue
+                del criteria[key]
+                if not values:
+                    return query.limit(0), False
+                return query.get_all(*values, index=indexes[field]), False
+
+        # Range lookups become between(), preferably on the ordered field
+        ranges = {}
+        for key in criteria.keys():
+            field, op = _split_lookup(key)
+            if op in RANGE_OPERATORS and field in indexes:
+                ranges.setdefault(field, []).append(key)
+        if ranges:
+            field = order_field if order_field in ranges else ranges.keys()[0]
+            lower, upper = r.minval, r.maxval
+            left_bound, right_bound = 'closed', 'open'
+            for key in sorted(ranges[field]):
+                op = _split_lookup(key)[1]
+                if op in ('gt', 'gte') and lower is r.minval:
+                    lower = criteria.pop(key)
+                    left_bound = 'open' if op == 'gt' else 'closed'
+                elif op in ('lt', 'lte') and upper is r.maxval:
+                    upper = criteria.pop(key)
+                    right_bound = 'closed' if op == 'lte' else 'open'
+            query = query.between(lower, upper, index=indexes[field],
+                                  left_bound=left_bound,
+                                  right_bound=right_bound)
+            if field != order_field:
+                return query, False
+            return query.order_by(index=_order_term(order_by[0],
+                                                    indexes[field])), True
+
+        # Otherwise only the primary index can provide the order, secondary
+        # indexes leave out the documents where the field is None
+        pk = self._document.__primary_key__
+        if order_field == pk:
+            return query.order_by(index=_order_term(order_by[0], pk)), True
+        return query, False
+
+    def _build_filter(self, query, criteria):
+        # Plain equality lookups are combined into a single filter object,
+        # lookups with an operator become a predicate each
+        equal = {}
+        for key, value in criteria.items():
+            field, op = _split_lookup(key)
+            if op is None:
+                equal[field] = value
+            else:
+                query = query.filter(_lookup_predicate(field, op, value))
+        if equal:
+            query = query.filter(equal)
+        return query
+
+    def _pk_lookup(self):
+        # Returns the primary key when the query is a plain point lookup
+        pk = self._document.__primary_key__
+        if (self._filter.keys() != [pk] or self._filter_funcs or
+                self._skip or self._limit == 0):
+            return None
+        return self._filter[pk]
+
+    def _build_cursor_obj(self):
+        self._close_cursor()
+        self._cursor_obj = self._build_query()
         self._iter_index = 0
-        self._cursor_iter = iter(self._cursor_obj.run(get_conn()))
+        self._result_buffer.clear()
+        # The connection stays checked out until the cursor is exhausted
+        pool = get_pool()
+        conn = pool.acquire()
+        try:
+            result = self._cursor_obj.run(conn)
+        except Exception:
+            pool.release(conn)
+            raise
+        if isinstance(result, r.net.Cursor):
+            self._cursor_handle = (pool, conn, result)
+        else:
+            pool.release(conn)
+        self._cursor_iter = iter(result)
+
+    def _close_cursor(self):
+        # Stops a running cursor and returns its connection to the pool
+        if self._cursor_handle is not None:
+            pool, conn, cursor = self._cursor_handle
+            self._cursor_handle = None
+            try:
+                cursor.close()
+            finally:
+                pool.release(conn)
+
+    def __del__(self):
+        self._close_cursor()
 
     def __getitem__(self, key):
+        if self._result_cache is not None:
+            if not isinstance(key, (slice, int, long)):
+                raise TypeError('Invalid argument type')
+            return self._result_cache[key]
         if isinstance(key, slice):
-            self._build_cursor_obj()
-            # Get the start, stop, and step from the slice
-            return [self[i] for i in xrange(*key.indices(len(self)))]
-        elif isinstance(key, int):
-            self._build_cursor_obj()
+            start, stop, step = key.start, key.stop, key.step
+            if (start or 0) < 0 or (stop or 0) < 0:
+                # Negative bounds are resolved against the document count
+                start, stop, _ = key.indices(len(self))
+            start = start or 0
+            if self._limit is not None:
+                stop = self._limit if stop is None else min(stop,
+                                                              self._limit)
+            qs = self._clone()
+            qs._skip = (self._skip or 0) + start
+            qs._limit = None if stop is None else max(stop - start, 0)
+            if step not in (None, 1):
+                return list(qs)[::step]
+            return qs
+        elif isinstance(key, (int, long)):
+            qs = self._clone()
             if key < 0:
-                raise AssertionError('Negative indexing is not supported')
-            if key >= len(self):
+                if self._skip or self._limit is not None:
+                    key += len(self)
+                else:
+                    # Take the n-th document from the end in reverse order
+                    qs._order_by = self._reverse_order_by()
+                    key = -key - 1
+            if key < 0 or (self._limit is not None and key >= self._limit):
                 raise IndexError('List index out of range')
-            for i in xrange(key):
-                self.next()
-            doc = self.next()
-            return doc
+            qs._skip = (self._skip or 0) + key
+            qs._limit = 1
+            try:
+                return qs.next()
+            except StopIteration:
+                raise IndexError('List index out of range')
+            finally:
+                qs._close_cursor()
         else:
             raise TypeError('Invalid argument type')
 
+    def _reverse_order_by(self):
+        order_by = self._order_by or self._document.__order_by__
+        if not order_by:
+            raise AssertionError('Negative indexing is not supported '
+                                 'without an order')
+        return tuple([f[1:] if f.startswith('-') else '-' + f
+                      for f in order_by])
+
+    def _clone(self):
+        qs = self.__class__(self._document)
+        qs._filter = dict(self._filter)
+        qs._filter_funcs = list(self._filter_funcs)
+        qs._limit = self._limit
+        qs._skip = self._skip
+        qs._order_by = self._order_by
+        qs._select_related = self._select_related
+        qs._only = self._only
+        qs._defer = self._defer
+        qs._values = self._values
+        return qs
+
     def __call__(self):
         return self
 
     def __iter__(self):
-        return self
+        self._fetch_all()
+        return iter(self._result_cache)
+
+    def iterator(self, batch_size=ITERATOR_BATCH_SIZE, prefetch=0,
+                 max_batch_bytes=None):
+        # Streams the results without filling the result cache. Rows are
+        # fetched and turned into documents batch_size at a time; with
+        # prefetch, up to that many batches are read ahead in a background
+        # thread while the caller works through the current one.
+        options = {'max_batch_rows': batch_size}
+        if max_batch_bytes is not None:
+            options['max_batch_bytes'] = max_batch_bytes
+        batches = self._read_batches(batch_size, options)
+        if prefetch:
+            batches = _prefetch(batches, prefetch)
+        for rows in batches:
+            for doc in self._hydrate_batch(rows):
+                yield doc
+
+    def _read_batches(self, batch_size, options):
+        # Yields lists of rows from a cursor on a connection of its own
+        pool = get_pool()
+        conn = pool.acquire()
+        cursor = None
+        try:
+            cursor = self._build_query().run(conn, **options)
+            rows = iter(cursor)
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                yield batch
+        finally:
+            try:
+                if isinstance(cursor, r.net.Cursor):
+                    cursor.close()
+            finally:
+                pool.release(conn)
+
+    def changes(self, include_initial=False, squash=False, reconnect=True):
+        # Yields a ChangeEvent for every change of the matching documents,
+        # and first one for every current document with include_initial.
+        # When the connection is lost the feed is reopened; changes made in
+        # the meantime are missed, unless include_initial resends the
+        # current documents. A skip cannot be applied to a feed.
+        if self._skip:
+            raise InvalidQueryError('changes() does not support skip()')
+        if self._limit is not None:
+            query = self._build_limited_feed()
+        else:
+            query = self._build_query(ordered=False)
+        pool = get_pool()
+        while True:
+            try:
+                conn = pool.acquire()
+            except ConnectionError:
+                if not reconnect:
+                    raise
+                time.sleep(CHANGES_RECONNECT_DELAY)
+                continue
+            feed = None
+            try:
+                feed = query.changes(
+                    include_initial=include_initial, squash=squash).run(conn)
+                for change in feed:
+                    if 'old_val' in change or 'new_val' in change:
+                        yield self._change_event(change)
+                return
+            except r.RqlDriverError:
+                if not reconnect:
+                    raise
+            finally:
+                try:
+                    if feed is not None:
+                        feed.close()
+                finally:
+                    pool.release(conn)
+            time.sleep(CHANGES_RECONNECT_DELAY)
+
+    def _build_limited_feed(self):
+        # The server only opens a feed on a limit when the table is ordered
+        # by an index, on a single field with the primary or a single field
+        # secondary index
+        order_by = self._order_by or self._document.__order_by__
+        if not order_by or len(order_by) != 1:
+            raise InvalidQueryError(
+                'changes() with limit() needs an order_by() on one field')
+        field = order_by[0].lstrip('-')
+        index = None
+        if field == self._document.__primary_key__:
+            index = field
+        else:
+            for name, fields in self._document._get_indexes().items():
+                if tuple(fields) == (field,):
+                    index = name
+                    break
+        if index is None:
+            raise InvalidQueryError(
+                "changes() with limit() needs an index on '%s'" % field)
+        query = r.table(self._document.__table_name__).order_by(
+            index=_order_term(order_by[0], index))
+        query = self._build_filter(query, dict(self._filter))
+        for func in self._filter_funcs:
+            query = query.filter(func)
+        return self._project(query.limit(self._limit))
+
+    def _change_event(self, change):
+        old, new = change.get('old_val'), change.get('new_val')
+        if 'old_val' not in change:
+            kind = 'initial'
+        elif old is None:
+            kind = 'insert'
+        elif new is None:
+            kind = 'delete'
+        else:
+            kind = 'update'
+        old, new = [None if row is None else self._hydrate_batch([row])[0]
+                    for row in (old, new)]
+        return ChangeEvent(old, new, kind)
+
+    def __nonzero__(self):
+        self._fetch_all()
+        return bool(self._result_cache)
+
+    def _fetch_all(self):
+        if self._result_cache is None:
+            self._build_cursor_obj()
+            results = []
+            while True:
+                try:
+                    results.append(self.next())
+                except StopIteration:
+                    break
+            self._result_cache = results
 
     def next(self):
+        if not self._result_buffer:
+            batch_size = RELATED_BATCH_SIZE if self._select_related else 1
+            rows = list(islice(self._cursor, batch_size))
+            if not rows:
+                self._close_cursor()
+                raise StopIteration
+            self._result_buffer.extend(self._hydrate_batch(rows))
         self._iter_index += 1
-        doc = self._document()
-        doc._dirty = False
-        for name, value in self._cursor.next().items():
-            if name == self._document.__primary_key__:
-                doc._fields['id'] = ObjectIdField()
-                doc._data['id'] = value
-            field_name = name
-            if field_name not in doc._fields:
-                #ReferenceField
-                if field_name.endswith('_id') and field_name[:-3] in doc._fields:
-                    field_name = field_name[:-3]
-                else:
-                    continue
-            # Bypass __setattr__ to prevent _dirty from being set to True
-            doc._data[name] = doc._to_python(field_name, value)
+        return self._result_buffer.popleft()
 
-        return doc
+    def _hydrate_batch(self, rows):
+        if self._values is not None:
+            return self._rows_to_values(rows)
+        related = self._resolve_related(rows)
+        loaded = self._loaded_fields()
+        return [self._document._from_db(row, related, loaded)
+                for row in rows]
 
-    def __repr__(self):
-        data = []
-        for i, doc in enumerate(self):
-            data.append(doc)
+    def _rows_to_values(self, rows):
+        mode, fields, convert = self._values
+        if mode == 'dicts':
+            return rows
+        keys = self._db_keys(fields)
+        converters = [None] * len(fields)
+        if convert:
+            converters = [self._document._fields[name].to_python
+                          if not isinstance(self._document._fields[name],
+                                            ReferenceField) else None
+                          for name in fields]
+        results = []
+        for row in rows:
+            values = [row.get(key) for key in keys]
+            if convert:
+                values = [f(v) if f else v for f, v in zip(converters, values)]
+            if mode == 'values':
+                results.append(dict(zip(fields, values)))
+            elif mode == 'flat':
+                results.append(values[0])
+            else:
+                results.append(tuple(values))
+        return results
 
-            if len(data) > REPR_SIZE:
-                data[-1] = '.. more objects ..'
-                break
+    def _resolve_related(self, rows):
+        # Fetch the documents referenced by a batch of rows with a single
+        # get_all() per ReferenceField, keyed by field name and primary key
+        related = {}
+        session = get_session()
+        for name in self._select_related:
+            document_type = self._document._fields[name].document_type
+            ids = set(row.get(name + '_id') for row in rows)
+            ids.discard(None)
+            related[name] = {}
+            if session is not None:
+                for pk in list(ids):
+                    doc = session.get(document_type, pk)
+                    if doc is not None:
+                        related[name][pk] = doc
+                        ids.discard(pk)
+            if ids:
+                for doc in document_type.get_all(*ids):
+                    related[name][doc.id] = doc
+        return related
 
+    def __repr__(self):
+        data = list(self[:REPR_SIZE + 1])
+        if len(data) > REPR_SIZE:
+            data[-1] = '.. more objects ..'
         return repr(data)
 
     def all(self):
         return self.__call__()
 
+    def select_related(self, *fields):
+        # Without arguments, all ReferenceFields of the document are resolved
+        if not fields:
+            fields = [name for name, field in self._document._fields.items()
+                      if isinstance(field, ReferenceField)]
+        for name in fields:
+            if not isinstance(self._document._fields.get(name), ReferenceField):
+                message = "'%s' is not a ReferenceField" % name
+                raise InvalidQueryError(message)
+        self._select_related = tuple(fields)
+        self._result_cache = None
+        return self.__call__()
+
+    def as_dicts(self):
+        # Return the rows as stored instead of documents
+        self._values = ('dicts', None, False)
+        self._result_cache = None
+        return self.__call__()
+
+    def values(self, *fields, **kwargs):
+        # Return dicts of the given fields, or of all fields, instead of
+        # documents. References are returned as primary keys, other values
+        # as stored unless convert=True.
+        self._set_values('values', fields, **kwargs)
+        self._result_cache = None
+        return self.__call__()
+
+    def values_list(self, *fields, **kwargs):
+        # Like values() but returns tuples, or single values with flat=True
+        mode = 'flat' if kwargs.pop('flat', False) else 'tuples'
+        if mode == 'flat' and len(fields) != 1:
+            raise InvalidQueryError('flat=True takes exactly one field')
+        self._set_values(mode, fields, **kwargs)
+        self._result_cache = None
+        return self.__call__()
+
+    def _set_values(self, mode, fields, convert=False):
+        self._check_fields(fields)
+        self._values = (mode, tuple(fields or self._document._fields),
+                        convert)
+
+    def only(self, *fields):
+        # Fetch just the given fields, the others are loaded on first access
+        self._check_fields(fields)
+        self._only = tuple(fields)
+        self._result_cache = None
+        return self.__call__()
+
+    def defer(self, *fields):
+        # Leave out the given fields, they are loaded on first access
+        self._check_fields(fields)
+        if 'id' in fields or self._document.__primary_key__ in fields:
+            raise InvalidQueryError('The primary key cannot be deferred')
+        self._defer += tuple(fields)
+        self._result_cache = None
+        return self.__call__()
+
+    def _check_fields(self, fields):
+        for name in fields:
+            if name not in self._document._fields:
+                raise InvalidQueryError("Unknown field '%s'" % name)
+
     def filter(self, *args, **kwargs):
         if args and callable(args[0]):
-            self._filter = args[0]
+            self._filter_funcs.append(args[0])
 
         for k, v in kwargs.items():
+            field, op = _split_lookup(k)
+            if field == 'id':
+                field = self._document.__primary_key__
+            k = field if op is None else '%s__%s' % (field, op)
             if k in self._filter:
                 message = "Encountered '%s' more than once in query" % k
                 raise InvalidQueryError(message)
-            elif k == 'id':
-                k = self._document.__primary_key__
             self._filter[k] = v
+        self._result_cache = None
         return self.__call__()
 
     def insert(self, batch):
         self._cursor_obj = r.table(self._document.__table_name__)
-        map(lambda i: i.validate(), batch)
-        result = self._cursor_obj.insert(map(lambda i: i._doc, batch)).run(get_conn())
+        errors = self._document.validate_many(batch)
+        if errors:
+            raise ValidationError('; '.join(
+                'Document %d: %s' % (index, message)
+                for index, name, message in errors))
+        result = run(self._cursor_obj.insert(map(lambda i: i._doc, batch)))
         return result.get("generated_keys", [])
 
+    def bulk_insert(self, documents, chunk_size=BULK_INSERT_CHUNK_SIZE,
+                    conflict='error', durability=None, return_changes=False):
+        # Inserts documents from any iterable, chunk_size per query, while
+        # the next chunk is read and validated in a background thread.
+        # Generated keys are set on the documents. Failed inserts don't stop
+        # the others; they are counted and the first error of every chunk is
+        # listed as (index of the chunk's first document, error). Invalid
+        # documents aren't sent, they are listed as (index, field, error).
+        options = {'conflict': conflict, 'return_changes': return_changes}
+        if durability is not None:
+            options['durability'] = durability
+        table = r.table(self._document.__table_name__)
+        summary = {'inserted': 0, 'replaced': 0, 'unchanged': 0,
+                   'errors': 0, 'chunk_errors': [], 'invalid': []}
+        if return_changes:
+            summary['changes'] = []
+        chunks = self._insert_chunks(documents, chunk_size)
+        for offset, docs, rows, invalid in _prefetch(chunks, 1):
+            summary['invalid'].extend(invalid)
+            if not docs:
+                continue
+            result = run(table.insert(rows, **options))
+            for key in ('inserted', 'replaced', 'unchanged', 'errors'):
+                summary[key] += result.get(key, 0)
+            if result.get('errors'):
+                summary['chunk_errors'].append((offset, result['first_error']))
+            if return_changes:
+                summary['changes'].extend(result.get('changes', []))
+            self._set_inserted(docs, result)
+        if conflict != 'error':
+            self._invalidate()
+        return summary
+
+    def _insert_chunks(self, documents, size):
+        documents = iter(documents)
+        offset = 0
+        while True:
+            docs = list(islice(documents, size))
+            if not docs:
+                return
+            invalid = [(offset + index, name, message) for index, name, message
+                       in self._document.validate_many(docs)]
+            if invalid:
+                skip = set(index - offset for index, name, message in invalid)
+                valid = [doc for index, doc in enumerate(docs)
+                         if index not in skip]
+            else:
+                valid = docs
+            yield offset, valid, [doc._doc for doc in valid], invalid
+            offset += len(docs)
+
+    def _set_inserted(self, docs, result):
+        # Keys are generated in order for the documents without one. The
+        # documents of a chunk without errors are saved as far as they know.
+        keys = iter(result.get('generated_keys', []))
+        session = get_session()
+        for doc in docs:
+            if doc._get_value('id') is None:
+                doc._data['id'] = next(keys, None)
+            if not result.get('errors'):
+                doc._dirty = False
+                doc._clear_changes()
+                if session is not None:
+                    session.add(doc)
+
     def get(self, **kwargs):
         self.filter(**kwargs)
+        pk = self._pk_lookup()
+        if pk is not None:
+            doc = self._get_by_pk(pk)
+            if doc is None:
+                message = 'Query did not match any %s objects' % \
+                    self._document.__name__
+                raise self._document.DoesNotExist(message)
+            return doc
         self._limit = 2
         try:
             doc1 = self.next()
@@ -142,10 +734,36 @@ class QuerySet(object):
             doc2 = self.next()
         except StopIteration:
             return doc1
+        finally:
+            self._close_cursor()
         message = 'Query returned more than 1 %s object' % \
             self._document.__name__
         raise self._document.MultipleObjectsReturned(message)
 
+    def _get_by_pk(self, pk):
+        session = get_session()
+        if session is not None and self._values is None:
+            doc = session.get(self._document, pk)
+            if doc is not None:
+                return doc
+        query = r.table(self._document.__table_name__).get(pk)
+        cache = self._document.__cache__
+        if self._loaded_fields() is not None:
+            query = query.do(lambda row: r.branch(row.eq(None), None,
+                                                  self._project(row)))
+            row = run(query)
+        elif cache is not None:
+            row = cache.get(self._document._cache_key(pk))
+            if row is None:
+                row = run(query)
+                if row is not None:
+                    cache.set(self._document._cache_key(pk), row)
+        else:
+            row = run(query)
+        if row is None:
+            return None
+        return self._hydrate_batch([row])[0]
+
     def get_or_create(self, **kwargs):
         # Shorthand function for either getting a document, and if it doesn't
         # exist, creating it.
@@ -157,13 +775,49 @@ class QuerySet(object):
             created = True
         return created, doc
 
+    def upsert(self, **kwargs):
+        # Inserts a document, or updates the given fields of the stored
+        # document with the same primary key, in a single query
+        doc = self._document(**kwargs)
+        # Values equal to the defaults are sent as well
+        doc._changed_fields.update(name for name in kwargs
+                                   if name in doc._fields)
+        doc.save(upsert=True)
+        return doc
+
+    def update_or_create(self, defaults=None, **kwargs):
+        # Updates the document matching kwargs with defaults, or creates it
+        # from both. A single upsert when kwargs is the primary key, else the
+        # document is looked up first.
+        values = dict(kwargs)
+        values.update(defaults or {})
+        pk = self._document.__primary_key__
+        if set(kwargs) not in (set(['id']), set([pk])):
+            doc = self._document.objects.first(**kwargs)
+            if doc is not None:
+                for name, value in (defaults or {}).items():
+                    setattr(doc, name, value)
+                doc.save()
+                return False, doc
+            return True, self.create(**values)
+        doc = self._document(**values)
+        doc._changed_fields.update(name for name in values
+                                   if name in doc._fields)
+        result = doc._save(upsert=True)
+        return result['inserted'] == 1, doc
+
     def first(self, **kwargs):
         self.filter(**kwargs)
+        pk = self._pk_lookup()
+        if pk is not None:
+            return self._get_by_pk(pk)
         self._limit = 1
         try:
             doc = self.next()
         except StopIteration:
             doc = None
+        finally:
+            self._close_cursor()
         return doc
 
     def create(self, **kwargs):
@@ -172,16 +826,81 @@ class QuerySet(object):
         return doc
 
     def __len__(self):
-        if not self._cursor_obj:
-            self._build_cursor_obj()
-        return self._cursor_obj.count().run(get_conn())
+        if self._result_cache is not None:
+            return len(self._result_cache)
+        return run(self._build_selection().count())
+
+    def count(self):
+        return len(self)
+
+    def sum(self, field):
+        return run(self._aggregate_query(field).sum())
+
+    def avg(self, field):
+        # None when no document has the field
+        return run(self._aggregate_query(field).avg().default(None))
+
+    def min(self, field):
+        index = self._aggregate_index(field)
+        if index is not None:
+            key = self._db_keys([field])[0]
+            query = self._build_selection().min(index=index)[key]
+        else:
+            query = self._aggregate_query(field).min()
+        return run(query.default(None))
+
+    def max(self, field):
+        index = self._aggregate_index(field)
+        if index is not None:
+            key = self._db_keys([field])[0]
+            query = self._build_selection().max(index=index)[key]
+        else:
+            query = self._aggregate_query(field).max()
+        return run(query.default(None))
+
+    def distinct(self, field):
+        index = self._aggregate_index(field)
+        if index is not None:
+            query = self._build_selection().distinct(index=index)
+        else:
+            query = self._aggregate_query(field).distinct()
+        return run(query)
+
+    def group(self, field):
+        # Aggregate per value of field, e.g. qs.group('country').count()
+        self._check_fields([field])
+        return GroupedQuerySet(self, field)
+
+    def _aggregate_query(self, field):
+        # The values of field of the matching documents, leaving out None as
+        # indexes do, so results don't depend on whether there is an index
+        self._check_fields([field])
+        key = self._db_keys([field])[0]
+        return self._build_selection()[key].filter(_is_set)
+
+    def _aggregate_index(self, field):
+        # A simple index on field, if the query is a plain table it can be
+        # answered by
+        self._check_fields([field])
+        if (self._filter or self._filter_funcs or self._skip or
+                self._limit is not None):
+            return None
+        key = self._db_keys([field])[0]
+        if key == self._document.__primary_key__:
+            return key
+        for name, fields in self._document._get_indexes().items():
+            if fields == (key,):
+                return name
+        return None
 
     def limit(self, limit):
         self._limit = limit
+        self._result_cache = None
         return self.__call__()
 
     def skip(self, skip):
         self._skip = skip
+        self._result_cache = None
         return self.__call__()
 
     def order_by(self, *args):
@@ -189,12 +908,257 @@ class QuerySet(object):
         self._order_by = tuple([a.replace(a.lstrip('-'),
             self._document.__primary_key__) if a in ('id', '-id') else
             a for a in args])
+        self._result_cache = None
         return self.__call__()
 
-    def delete(self):
-        self._build_cursor_obj()
-        for doc in self:
-            doc.delete()
+    def delete(self, signals=False):
+        # Deletes all matching documents with a single query and returns the
+        # number of deleted documents. With signals, every document is
+        # loaded and deleted on its own so its delete signals are fired.
+        self._result_cache = None
+        if signals:
+            count = 0
+            # iterator() leaves the result cache empty
+            for doc in self.iterator():
+                doc.delete()
+                count += 1
+            return count
+        result = run(self._build_selection().delete())
+        _check_write_result(result)
+        self._invalidate()
+        return result['deleted']
+
+    def update(self, signals=False, server_validate=False, **changes):
+        # Updates all matching documents with a single query and returns the
+        # number of changed documents. Values may be ReQL expressions such
+        # as r.row['count'] + 1; with server_validate the server checks their
+        # results against the fields and fails the update of the documents
+        # they aren't valid for. With signals, every document is loaded and
+        # saved on its own so its update signals are fired, which needs
+        # plain values.
+        self._result_cache = None
+        if signals:
+            for name, value in changes.items():
+                if isinstance(value, r.RqlQuery):
+                    raise InvalidQueryError(
+                        "Field '%s': ReQL values cannot be used with "
+                        "signals=True" % name)
+            count = 0
+            for doc in self.iterator():
+                for name, value in changes.items():
+                    setattr(doc, name, value)
+                if doc._dirty:
+                    doc.save()
+                    count += 1
+            return count
+        changes = self._build_changes(changes)
+        if server_validate:
+            changes = self._server_checked(changes)
+        result = run(self._build_selection().update(changes))
+        _check_write_result(result)
+        self._invalidate()
+        return result['replaced']
+
+    def _server_checked(self, changes):
+        # Wraps the ReQL values of changes, keyed by stored key, to raise an
+        # error on the server unless the value is valid for the field. Other
+        # values are validated by _build_changes().
+        names = dict((key, name) for name, key in
+                     self._document._row_keys.items())
+        checked = {}
+        for key, value in changes.items():
+            if isinstance(value, r.RqlQuery):
+                value = _server_check(self._document._fields[names[key]],
+                                      key, value)
+            checked[key] = value
+        return checked
+
+    def _invalidate(self):
+        # Documents changed by a bulk write can't be told apart, so forget
+        # all documents of this type loaded in the current session and cached
+        session = get_session()
+        if session is not None:
+            session.clear(self._document)
+        if self._document.__cache__ is not None:
+            self._document.__cache__.clear()
+
+    def _build_changes(self, changes):
+        # Validates and converts {field: value} to the stored representation
+        doc = {}
+        for name, value in changes.items():
+            field = self._document._fields.get(name)
+            if field is None:
+                raise InvalidQueryError("Unknown field '%s'" % name)
+            if name == 'id' or name == self._document.__primary_key__:
+                raise InvalidQueryError('The primary key cannot be updated')
+            if isinstance(field, ReferenceField):
+                name += '_id'
+            if not isinstance(value, r.RqlQuery):
+                if not field.is_valid(value):
+                    raise ValidationError('Field %s: %s is of wrong type %s' %
+                                          (name, field.__class__.__name__,
+                                           type(value)))
+                if value is not None:
+                    value = field.to_rethink(value)
+            doc[name] = value
+        return doc
+
+
+class GroupedQuerySet(object):
+    # Aggregates of a QuerySet per value of a field, as {value: result}
+
+    def __init__(self, queryset, field):
+        self._queryset = queryset
+        self._field = field
+
+    def count(self):
+        return self._run(lambda grouped: grouped.count())
+
+    # Groups without any value of field are left out by the aggregates
+
+    def sum(self, field):
+        return self._run(lambda grouped: grouped[self._key(field)].sum(),
+                         field)
+
+    def avg(self, field):
+        return self._run(lambda grouped: grouped[self._key(field)].avg(),
+                         field)
+
+    def min(self, field):
+        return self._run(lambda grouped: grouped[self._key(field)].min(),
+                         field)
+
+    def max(self, field):
+        return self._run(lambda grouped: grouped[self._key(field)].max(),
+                         field)
+
+    def _key(self, field):
+        self._queryset._check_fields([field])
+        return self._queryset._db_keys([field])[0]
+
+    def _run(self, reduction, field=None):
+        # Documents where the grouped field or field is None are left out,
+        # as the index leaves them out when grouping by index. Only a table
+        # can be grouped by index.
+        qs = self._queryset
+        index = qs._aggregate_index(self._field)
+        query = qs._build_selection()
+        if field is not None:
+            query = query.filter(_has_value(self._key(field)))
+            index = None
+        if index is not None:
+            grouped = query.group(index=index)
+        else:
+            key = self._key(self._field)
+            grouped = query.filter(_has_value(key)).group(key)
+        result = run(reduction(grouped).ungroup())
+        return dict((_hashable(g['group']), g['reduction']) for g in result)
+
+
+def _is_set(value):
+    return value.ne(None)
+
+
+def _has_value(key):
+    # Predicate of the documents where key is set and not None
+    return lambda doc: doc[key].default(None).ne(None)
+
+
+def _hashable(value):
+    # Groups on list fields have list keys
+    if isinstance(value, list):
+        return tuple(_hashable(v) for v in value)
+    return value
+
+
+def _prefetch(batches, size):
+    # Reads up to size items of batches ahead in a background thread
+    queue = Queue.Queue(size)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for batch in batches:
+                if not put((batch, None)):
+                    return
+            put((None, None))
+        except Exception:
+            put((None, sys.exc_info()))
+        finally:
+            batches.close()
+
+    thread = threading.Thread(target=produce)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            batch, error = queue.get()
+            if error is not None:
+                raise error[0], error[1], error[2]
+            if batch is None:
+                return
+            yield batch
+    finally:
+        stop.set()
+
+
+def _server_check(field, name, value):
+    message = 'Field %s: invalid value for %s' % (name,
+                                                  field.__class__.__name__)
+
+    def check(v):
+        valid = field.rethink_check(v)
+        if valid is None:
+            return v
+        return r.branch(valid, v, r.error(message))
+    return value.do(check)
+
+
+def _check_write_result(result):
+    if result.get('errors'):
+        raise RqlOperationError(result['first_error'])
+
+
+def _split_lookup(key):
+    # 'name__in' -> ('name', 'in'), 'name' -> ('name', None)
+    if '__' in key:
+        field, op = key.rsplit('__', 1)
+        if op in LOOKUP_OPERATORS:
+            return field, op
+    return key, None
+
+
+def _order_term(field, index=None):
+    # '-name' -> r.desc('name'), 'name' -> r.asc('name'). When given, the
+    # index name is used in place of the field name.
+    if field.startswith('-'):
+        return r.desc(index or field[1:])
+    return r.asc(index or field)
+
+
+def _lookup_predicate(field, op, value):
+    # ReQL predicates are built from a closure, since the driver derives
+    # the number of arguments from the function signature
+    if op == 'in':
+        return lambda doc: r.expr(value).contains(doc[field])
+    elif op == 'gt':
+        return lambda doc: doc[field] > value
+    elif op == 'gte':
+        return lambda doc: doc[field] >= value
+    elif op == 'lt':
+        return lambda doc: doc[field] < value
+    elif op == 'lte':
+        return lambda doc: doc[field] <= value
+    raise InvalidQueryError("Unknown lookup operator '%s'" % op)
 
 
 class QuerySetManager(object):
@@ -0,0 +1,64 @@
+import threading
+
+__all__ = ['Session', 'get_session']
+
+_local = threading.local()
+
+
+class Session(object):
+    """Identity map for a unit of work, such as a web request.
+
+    Within a ``with Session():`` block every document is loaded at most once
+    per primary key: later loads return the same instance, and lookups by
+    primary key and references are answered without a query. Sessions are
+    per thread and may be nested, the innermost one being used.
+    """
+
+    def __init__(self):
+        # (document class, primary key) -> document
+        self._identity_map = {}
+
+    def __enter__(self):
+        if not hasattr(_local, 'stack'):
+            _local.stack = []
+        _local.stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.stack.remove(self)
+        self.clear()
+
+    def __len__(self):
+        return len(self._identity_map)
+
+    def __contains__(self, doc):
+        return self._key(doc) in self._identity_map
+
+    def get(self, document_type, pk):
+        return self._identity_map.get((document_type, pk))
+
+    def add(self, doc):
+        # Only documents with all fields loaded are kept, so that the cached
+        # instance can stand in for any later load
+        if doc._loaded_fields is None and doc._get_value('id') is not None:
+            self._identity_map[self._key(doc)] = doc
+
+    def remove(self, doc):
+        self._identity_map.pop(self._key(doc), None)
+
+    def clear(self, document_type=None):
+        if document_type is None:
+            self._identity_map.clear()
+            return
+        for key in self._identity_map.keys():
+            if key[0] is document_type:
+                del self._identity_map[key]
+
+    def _key(self, doc):
+        return doc.__class__, doc._get_value('id')
+
+
+def get_session():
+    # The innermost active session of the current thread, or None
+    stack = getattr(_local, 'stack', None)
+    return stack[-1] if stack else None
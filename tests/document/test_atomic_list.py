@@ -0,0 +1,74 @@
+from rethinkengine.connection import connect
+from rethinkengine.document import Document
+from rethinkengine.fields import *
+
+import unittest2 as unittest
+
+
+class Tagged(Document):
+    name = StringField()
+    tags = ListField()
+
+
+class AtomicListTestCase(unittest.TestCase):
+    def setUp(self):
+        connect('test')
+        Tagged.table_create()
+
+    def tearDown(self):
+        Tagged.table_drop()
+
+    def test_append(self):
+        t = Tagged(name='foo', tags=['a'])
+        t.save()
+        t.append('tags', 'b', 'c')
+        self.assertEqual(t.tags, ['a', 'b', 'c'])
+        t.save()
+        self.assertEqual(Tagged.objects.get(id=t.id).tags, ['a', 'b', 'c'])
+
+    def test_remove(self):
+        t = Tagged(name='foo', tags=['a', 'b', 'a'])
+        t.save()
+        t.remove('tags', 'a')
+        self.assertEqual(t.tags, ['b'])
+        t.save()
+        self.assertEqual(Tagged.objects.get(id=t.id).tags, ['b'])
+
+    def test_append_concurrent(self):
+        t = Tagged(name='foo', tags=['a'])
+        t.save()
+        other = Tagged.objects.get(id=t.id)
+        other.append('tags', 'b')
+        other.save()
+        t.append('tags', 'c')
+        t.save()
+        self.assertEqual(Tagged.objects.get(id=t.id).tags, ['a', 'b', 'c'])
+
+    def test_in_place_change_is_saved(self):
+        t = Tagged(name='foo', tags=['a'])
+        t.save()
+        t = Tagged.objects.get(id=t.id)
+        t.tags.append('b')
+        t.name = 'bar'
+        t.save()
+        self.assertEqual(Tagged.objects.get(id=t.id).tags, ['a', 'b'])
+
+    def test_unchanged_list_not_sent(self):
+        t = Tagged(name='foo', tags=['a'])
+        t.save()
+        other = Tagged.objects.get(id=t.id)
+        t.append('tags', 'b')
+        t.save()
+        other.name = 'bar'
+        self.assertNotIn('tags', other._changes)
+        other.save()
+        stored = Tagged.objects.get(id=t.id)
+        self.assertEqual((stored.name, stored.tags), ('bar', ['a', 'b']))
+
+    def test_in_place_change_only(self):
+        t = Tagged(name='foo', tags=['a'])
+        t.save()
+        t = Tagged.objects.get(id=t.id)
+        t.tags.append('b')
+        t.save()
+        self.assertEqual(Tagged.objects.get(id=t.id).tags, ['a', 'b'])
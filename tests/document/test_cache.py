@@ -0,0 +1,77 @@
+from rethinkengine.cache import LRUCache
+from rethinkengine.connection import connect, run
+from rethinkengine.document import Document
+from rethinkengine.fields import *
+
+import rethinkdb as r
+import unittest2 as unittest
+
+
+class Setting(Document):
+    __cache__ = LRUCache(max_entries=10)
+
+    name = StringField()
+    value = StringField()
+
+
+class Option(Document):
+    label = StringField()
+    setting = ReferenceField(Setting)
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        connect('test')
+        Setting.table_create()
+        Option.table_create()
+
+        self.setting = Setting(name='theme', value='dark')
+        self.setting.save()
+
+    def tearDown(self):
+        Option.table_drop()
+        Setting.table_drop()
+
+    def _update_behind_cache(self, value):
+        run(r.table('settings').get(self.setting.id).update({'value': value}))
+
+    def test_read_through(self):
+        self.assertEqual(Setting.objects.get(id=self.setting.id).value, 'dark')
+        self._update_behind_cache('light')
+        self.assertEqual(Setting.objects.get(id=self.setting.id).value, 'dark')
+        self.assertEqual(Setting.objects.get(name='theme').value, 'light')
+
+    def test_get_all(self):
+        Setting.objects.get(id=self.setting.id)
+        other = Setting(name='lang', value='en')
+        other.save()
+        self._update_behind_cache('light')
+        settings = Setting.get_all(self.setting.id, other.id)
+        self.assertEqual(sorted(s.value for s in settings), ['dark', 'en'])
+        self.assertEqual(len(Setting.__cache__), 2)
+
+    def test_references(self):
+        Option(label='Theme', setting=self.setting).save()
+        Setting.objects.get(id=self.setting.id)
+        self._update_behind_cache('light')
+        option = Option.objects.select_related().get(label='Theme')
+        self.assertEqual(option.setting.value, 'dark')
+
+    def test_invalidate_on_save(self):
+        setting = Setting.objects.get(id=self.setting.id)
+        setting.value = 'light'
+        setting.save()
+        self.assertEqual(Setting.objects.get(id=self.setting.id).value,
+                         'light')
+
+    def test_invalidate_on_delete(self):
+        Setting.objects.get(id=self.setting.id)
+        self.setting.delete()
+        with self.assertRaises(Setting.DoesNotExist):
+            Setting.objects.get(id=self.setting.id)
+
+    def test_invalidate_on_bulk_update(self):
+        Setting.objects.get(id=self.setting.id)
+        Setting.objects.update(value='light')
+        self.assertEqual(Setting.objects.get(id=self.setting.id).value,
+                         'light')
@@ -0,0 +1,73 @@
+from rethinkengine.connection import connect
+from rethinkengine.document import Document
+from rethinkengine.fields import *
+
+import unittest2 as unittest
+
+
+class Event(Document):
+    __compact__ = True
+
+    name = StringField()
+    count = IntegerField()
+    tags = ListField()
+
+
+class CompactTestCase(unittest.TestCase):
+    def setUp(self):
+        connect('test')
+        Event.table_create()
+
+        Event(name='start', count=1, tags=['a']).save()
+        Event(name='stop', count=2).save()
+
+    def tearDown(self):
+        Event.table_drop()
+
+    def test_no_dict(self):
+        event = Event.objects.get(name='start')
+        self.assertFalse(hasattr(event, '__dict__'))
+        with self.assertRaises(AttributeError):
+            event.other = 1
+
+    def test_load_and_save(self):
+        event = Event.objects.get(name='start')
+        self.assertEqual((event.name, event.count, event.tags),
+                         ('start', 1, ['a']))
+        self.assertFalse(event._dirty)
+        event.count = 3
+        self.assertEqual(event._changed_fields, set(['count']))
+        event.save()
+        self.assertEqual(Event.objects.get(id=event.id).count, 3)
+
+    def test_increment(self):
+        event = Event.objects.get(name='stop')
+        event.increment('count')
+        event.save()
+        self.assertEqual(Event.objects.get(id=event.id).count, 3)
+
+    def test_deferred(self):
+        event = Event.objects.only('name').get(name='start')
+        self.assertEqual(event.count, 1)
+
+    def test_changes_created_lazily(self):
+        event = Event.objects.get(name='stop')
+        self.assertIsNone(event._changed_set)
+        self.assertIsNone(event._atomic_dict)
+        event.count = 3
+        self.assertEqual(event._changed_set, set(['count']))
+        event.save()
+        self.assertIsNone(event._changed_set)
+
+    def test_subclass(self):
+        class Player(Document):
+            name = StringField()
+
+        class CompactPlayer(Player):
+            __compact__ = True
+
+            score = IntegerField()
+
+        player = CompactPlayer(name='Jack', score=10)
+        self.assertEqual((player.name, player.score), ('Jack', 10))
+        self.assertEqual(player._doc, {'name': 'Jack', 'score': 10})
@@ -2,6 +2,8 @@ import datetime
 
 from .. import Foo, User
 from rethinkengine import RqlOperationError
+from rethinkengine.document import Document
+from rethinkengine.fields import BooleanField
 
 import unittest2 as unittest
 
@@ -97,3 +99,70 @@ class DocumentTestCase(unittest.TestCase):
         u = User.objects.get(email='contact1@example.com')
         self.assertIsInstance(u.born_date, datetime.date)
 
+
+    def test_changed_fields(self):
+        f = Foo(name='John')
+        f.save()
+        self.assertEqual(f._changed_fields, set())
+        f.number = 42
+        self.assertEqual(f._changed_fields, set(['number']))
+        self.assertEqual(f._changes, {'number': 42})
+
+    def test_partial_update(self):
+        f = Foo(name='John', number=1)
+        f.save()
+        # Another writer changes the number in the meantime
+        Foo.objects.filter(id=f.id).update(number=2)
+        f.name = 'Jack'
+        f.save()
+        f = Foo.objects.get(id=f.id)
+        self.assertEqual(f.name, 'Jack')
+        self.assertEqual(f.number, 2)
+
+    def test_increment(self):
+        f = Foo(name='John', number=1)
+        f.save()
+        Foo.objects.filter(id=f.id).update(number=10)
+        f.increment('number')
+        f.increment('number', 5)
+        self.assertEqual(f.number, 7)
+        f.save()
+        self.assertEqual(Foo.objects.get(id=f.id).number, 16)
+
+    def test_increment_new(self):
+        f = Foo(name='John')
+        f.increment('number', 2)
+        f.save()
+        self.assertEqual(Foo.objects.get(id=f.id).number, 2)
+
+    def test_increment_after_assignment(self):
+        f = Foo(name='John', number=1)
+        f.save()
+        f.number = 5
+        f.increment('number')
+        f.save()
+        self.assertEqual(Foo.objects.get(id=f.id).number, 6)
+
+    def test_values_stored_once(self):
+        f = Foo(name='John')
+        self.assertNotIn('name', f.__dict__)
+        self.assertEqual(f._data['name'], 'John')
+        f.save()
+        f = Foo.objects.get(id=f.id)
+        self.assertEqual(f.name, 'John')
+        f.name = 'Jack'
+        self.assertEqual(f.name, 'Jack')
+        self.assertEqual(f._changed_fields, set(['name']))
+
+    def test_falsy_values(self):
+        f = Foo(number=0)
+        self.assertEqual(f.number, 0)
+        self.assertEqual(f._changed_fields, set(['number']))
+
+        class Bar(Document):
+            flag = BooleanField(default=True)
+
+        b = Bar()
+        self.assertTrue(b.flag)
+        b.flag = False
+        self.assertIs(b.flag, False)
@@ -0,0 +1,51 @@
+from rethinkengine.connection import connect
+from rethinkengine.document import Document
+from rethinkengine.fields import *
+
+import unittest2 as unittest
+
+
+class Writer(Document):
+    name = StringField()
+
+
+class Article(Document):
+    title = StringField()
+    writer = ReferenceField(Writer, lazy=True)
+
+
+class LazyReferenceTestCase(unittest.TestCase):
+    def setUp(self):
+        connect('test')
+        Writer.table_create()
+        Article.table_create()
+
+        self.writer = Writer(name='John')
+        self.writer.save()
+        Article(title='Article', writer=self.writer).save()
+
+    def tearDown(self):
+        Article.table_drop()
+        Writer.table_drop()
+
+    def test_lazy(self):
+        article = Article.objects.get(title='Article')
+        self.assertIsInstance(article.writer, LazyReference)
+        self.assertIsNone(article.writer._document)
+
+    def test_reference_id(self):
+        article = Article.objects.get(title='Article')
+        self.assertEqual(article.writer_id, self.writer.id)
+        self.assertIsNone(article.writer._document)
+
+    def test_fetch_on_access(self):
+        article = Article.objects.get(title='Article')
+        self.assertEqual(article.writer.name, 'John')
+        self.assertIsInstance(article.writer._document, Writer)
+
+    def test_save_keeps_reference(self):
+        article = Article.objects.get(title='Article')
+        article.title = 'Renamed'
+        article.save()
+        article = Article.objects.get(title='Renamed')
+        self.assertEqual(article.writer_id, self.writer.id)
@@ -0,0 +1,68 @@
+from rethinkengine.connection import connect
+from rethinkengine.document import Document
+from rethinkengine.fields import *
+from rethinkengine.session import Session, get_session
+
+import unittest2 as unittest
+
+
+class Parent(Document):
+    name = StringField()
+
+
+class Child(Document):
+    name = StringField()
+    parent = ReferenceField(Parent)
+
+
+class SessionTestCase(unittest.TestCase):
+    def setUp(self):
+        connect('test')
+        Parent.table_create()
+        Child.table_create()
+
+        self.parent = Parent(name='Parent')
+        self.parent.save()
+        Child(name='Child 1', parent=self.parent).save()
+        Child(name='Child 2', parent=self.parent).save()
+
+    def tearDown(self):
+        Child.table_drop()
+        Parent.table_drop()
+
+    def test_identity(self):
+        with Session():
+            p1 = Parent.objects.get(id=self.parent.id)
+            p2 = Parent.objects.get(name='Parent')
+            self.assertIs(p1, p2)
+        self.assertIsNot(Parent.objects.get(id=self.parent.id), p1)
+
+    def test_references(self):
+        with Session():
+            children = list(Child.objects.order_by('name'))
+            self.assertIs(children[0].parent, children[1].parent)
+            related = list(Child.objects.select_related('parent'))
+            self.assertIs(related[0].parent, children[0].parent)
+
+    def test_saved_and_deleted(self):
+        with Session() as session:
+            parent = Parent(name='New')
+            parent.save()
+            self.assertIn(parent, session)
+            self.assertIs(Parent.objects.get(id=parent.id), parent)
+            parent.delete()
+            self.assertNotIn(parent, session)
+
+    def test_bulk_update_clears(self):
+        with Session() as session:
+            parent = Parent.objects.get(id=self.parent.id)
+            Parent.objects.update(name='Renamed')
+            self.assertEqual(len(session), 0)
+            self.assertEqual(Parent.objects.get(id=parent.id).name, 'Renamed')
+
+    def test_nested(self):
+        with Session() as outer:
+            with Session() as inner:
+                self.assertIs(get_session(), inner)
+            self.assertIs(get_session(), outer)
+        self.assertIsNone(get_session())
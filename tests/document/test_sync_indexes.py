@@ -0,0 +1,76 @@
+from rethinkengine.connection import connect
+from rethinkengine.document import Document
+from rethinkengine.fields import *
+from rethinkengine.indexes import Index
+
+import rethinkdb as r
+import unittest2 as unittest
+
+
+class Member(Document):
+    __indexes__ = [
+        'last_name',
+        Index('full_name', ['first_name', 'last_name']),
+        Index('roles', multi=True),
+        Index('name_length', func=lambda doc: doc['first_name'].count()),
+    ]
+
+    first_name = StringField(required=False)
+    last_name = StringField(required=False)
+    roles = ListField()
+
+
+class SyncIndexesTestCase(unittest.TestCase):
+    def setUp(self):
+        connect('test')
+        Member.table_create()
+
+        Member(first_name='John', last_name='Doe', roles=['Developer']).save()
+        Member(first_name='Jane', last_name='Doe', roles=['Designer']).save()
+
+    def tearDown(self):
+        Member.table_drop()
+
+    def test_declared(self):
+        self.assertEqual(Member._indexes.keys(),
+                         ['last_name', 'full_name', 'roles', 'name_length'])
+        self.assertEqual(Member._indexes['full_name'].fields,
+                         ('first_name', 'last_name'))
+
+    def test_sync_indexes(self):
+        created = Member.sync_indexes()
+        self.assertEqual(sorted(created), sorted(Member._indexes.keys()))
+        self.assertEqual(sorted(Member.index_list()), sorted(created))
+
+        self.assertEqual(len(Member.get_all('Doe', index='last_name')), 2)
+        self.assertEqual(len(Member.get_all(['Jane', 'Doe'],
+                                            index='full_name')), 1)
+        self.assertEqual(len(Member.get_all('Developer', index='roles')), 1)
+        self.assertEqual(len(Member.get_all(4, index='name_length')), 2)
+
+    def test_sync_indexes_only_missing(self):
+        Member.index_create('last_name')
+        Member.index_wait('last_name')
+        created = Member.sync_indexes()
+        self.assertNotIn('last_name', created)
+        self.assertEqual(Member.sync_indexes(), [])
+
+    def test_compound_index_query(self):
+        Member.sync_indexes()
+        f = Member.objects.filter(first_name='John', last_name='Doe')
+        self.assertIn('full_name', str(f._build_query()))
+        self.assertEqual(len(f), 1)
+
+    def test_declared_index_not_created(self):
+        f = Member.objects.filter(last_name='Doe')
+        self.assertNotIn('get_all', str(f._build_query()))
+        self.assertEqual(len(f), 2)
+        Member.sync_indexes()
+        f = Member.objects.filter(last_name='Doe')
+        self.assertIn('get_all', str(f._build_query()))
+
+    def test_multi_index_not_used(self):
+        Member.sync_indexes()
+        f = Member.objects.filter(roles=['Developer'])
+        self.assertNotIn('get_all', str(f._build_query()))
+        self.assertEqual(len(f), 1)
@@ -0,0 +1,57 @@
+from .. import Foo, User
+
+import datetime
+import unittest2 as unittest
+
+
+class UpsertTestCase(unittest.TestCase):
+    def setUp(self):
+        Foo.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_save_upsert(self):
+        User(email='john@example.com').save(upsert=True)
+        user = User(email='john@example.com',
+                    born_date=datetime.date(1980, 1, 1))
+        user.save(upsert=True)
+        self.assertEqual(User.objects.count(), 1)
+        self.assertFalse(user._dirty)
+        self.assertEqual(User.objects.get(email='john@example.com').born_date,
+                         datetime.date(1980, 1, 1))
+
+    def test_upsert_merges(self):
+        foo = Foo(name='foo', number=1)
+        foo.save()
+        upserted = Foo.objects.upsert(id=foo.id, number=2)
+        self.assertEqual(upserted.name, 'foo')
+        self.assertEqual(Foo.objects.get(id=foo.id).number, 2)
+
+    def test_save_upsert_subset(self):
+        foo = Foo(name='foo', number=1)
+        foo.save()
+        upserted = Foo(id=foo.id, name='bar')
+        upserted.save(upsert=True)
+        self.assertEqual(upserted.number, 1)
+        stored = Foo.objects.get(id=foo.id)
+        self.assertEqual((stored.name, stored.number), ('bar', 1))
+
+    def test_update_or_create(self):
+        born_date = datetime.date(1980, 1, 1)
+        created, user = User.objects.update_or_create(
+            email='john@example.com', defaults={'born_date': born_date})
+        self.assertTrue(created)
+        created, user = User.objects.update_or_create(
+            email='john@example.com',
+            defaults={'born_date': datetime.date(1990, 1, 1)})
+        self.assertFalse(created)
+        self.assertEqual(User.objects.get(email='john@example.com').born_date,
+                         datetime.date(1990, 1, 1))
+
+    def test_update_or_create_lookup(self):
+        created, foo = Foo.objects.update_or_create(
+            name='foo', defaults={'number': 1})
+        self.assertTrue(created)
+        created, foo = Foo.objects.update_or_create(
+            name='foo', defaults={'number': 2})
+        self.assertFalse(created)
+        self.assertEqual(Foo.objects.get(name='foo').number, 2)
@@ -1,5 +1,7 @@
 from .. import Foo
 from rethinkengine import ValidationError
+from rethinkengine.document import Document
+from rethinkengine.fields import IntegerField
 
 import unittest2 as unittest
 
@@ -13,3 +15,21 @@ class ValidateTestCase(unittest.TestCase):
     def test_validates(self):
         # If Document.__init__ doesn't raise an error, this test passes
         f = Foo(name='foo', number=42)
+
+    def test_validate_many(self):
+        docs = [Foo(name='foo', number=1), Foo(name=1), Foo(number='x')]
+        errors = Foo.validate_many(docs)
+        self.assertEqual([(index, name) for index, name, message in errors],
+                         [(1, 'name'), (2, 'number')])
+
+    def test_validate_many_valid(self):
+        self.assertEqual(Foo.validate_many([Foo(name='foo'), Foo()]), [])
+
+    def test_falsy_values(self):
+        class Bar(Document):
+            number = IntegerField(required=True)
+            positive = IntegerField(min_value=1)
+
+        Bar(number=0).validate()
+        with self.assertRaises(ValidationError):
+            Bar(number=0, positive=0).validate()
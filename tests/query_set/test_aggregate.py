@@ -0,0 +1,87 @@
+from rethinkengine.connection import connect
+from rethinkengine.document import Document
+from rethinkengine.fields import *
+from rethinkengine.query_set import InvalidQueryError
+
+import unittest2 as unittest
+
+
+class Sale(Document):
+    __indexes__ = ['region']
+
+    region = StringField()
+    product = StringField()
+    amount = IntegerField()
+
+
+class AggregateTestCase(unittest.TestCase):
+    def setUp(self):
+        connect('test')
+        Sale.table_create()
+        Sale.sync_indexes()
+
+        Sale(region='north', product='apple', amount=10).save()
+        Sale(region='north', product='pear', amount=20).save()
+        Sale(region='south', product='apple', amount=30).save()
+
+    def tearDown(self):
+        Sale.table_drop()
+
+    def test_count(self):
+        self.assertEqual(Sale.objects.filter(product='apple').count(), 2)
+
+    def test_sum(self):
+        self.assertEqual(Sale.objects.sum('amount'), 60)
+        self.assertEqual(Sale.objects.filter(region='north').sum('amount'), 30)
+        self.assertEqual(Sale.objects.filter(region='east').sum('amount'), 0)
+
+    def test_avg(self):
+        self.assertEqual(Sale.objects.avg('amount'), 20)
+        self.assertIsNone(Sale.objects.filter(region='east').avg('amount'))
+
+    def test_min_max(self):
+        self.assertEqual(Sale.objects.min('amount'), 10)
+        self.assertEqual(Sale.objects.max('amount'), 30)
+        self.assertEqual(Sale.objects.filter(product='apple').min('amount'),
+                         10)
+        self.assertEqual(Sale.objects.min('region'), 'north')
+        self.assertEqual(Sale.objects.max('region'), 'south')
+        self.assertIsNone(Sale.objects.filter(region='east').max('amount'))
+
+    def test_distinct(self):
+        self.assertEqual(sorted(Sale.objects.distinct('region')),
+                         ['north', 'south'])
+        self.assertEqual(sorted(Sale.objects.filter(amount__gt=10)
+                                .distinct('product')), ['apple', 'pear'])
+
+    def test_group(self):
+        self.assertEqual(Sale.objects.group('region').count(),
+                         {'north': 2, 'south': 1})
+        self.assertEqual(Sale.objects.group('product').sum('amount'),
+                         {'apple': 40, 'pear': 20})
+        self.assertEqual(Sale.objects.filter(product='apple')
+                         .group('region').max('amount'),
+                         {'north': 10, 'south': 30})
+
+    def test_unset_values(self):
+        # Unset fields are stored as None, indexes leave them out
+        Sale(product='plum').save()
+        self.assertEqual(Sale.objects.sum('amount'), 60)
+        self.assertEqual(Sale.objects.avg('amount'), 20)
+        self.assertEqual(Sale.objects.min('amount'), 10)
+        self.assertEqual(sorted(Sale.objects.distinct('region')),
+                         ['north', 'south'])
+        self.assertEqual(sorted(Sale.objects.distinct('amount')),
+                         [10, 20, 30])
+        self.assertEqual(Sale.objects.group('region').count(),
+                         {'north': 2, 'south': 1})
+        self.assertEqual(Sale.objects.group('product').count(),
+                         {'apple': 2, 'pear': 1, 'plum': 1})
+        self.assertEqual(Sale.objects.group('product').sum('amount'),
+                         {'apple': 40, 'pear': 20})
+
+    def test_invalid(self):
+        with self.assertRaises(InvalidQueryError):
+            Sale.objects.sum('doesnotexist')
+        with self.assertRaises(InvalidQueryError):
+            Sale.objects.group('doesnotexist')
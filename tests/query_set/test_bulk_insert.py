@@ -0,0 +1,56 @@
+from .. import Foo, User
+
+import datetime
+import unittest2 as unittest
+
+
+class BulkInsertTestCase(unittest.TestCase):
+    def setUp(self):
+        Foo.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_chunks_from_generator(self):
+        docs = []
+
+        def generate():
+            for i in range(1, 26):
+                doc = Foo(name='foo%d' % i, number=i)
+                docs.append(doc)
+                yield doc
+
+        result = Foo.objects.bulk_insert(generate(), chunk_size=10,
+                                         durability='soft')
+        self.assertEqual(result['inserted'], 25)
+        self.assertEqual(result['chunk_errors'], [])
+        self.assertEqual(Foo.objects.count(), 25)
+        self.assertTrue(all(doc.id for doc in docs))
+        self.assertFalse(docs[0]._dirty)
+        self.assertEqual(Foo.objects.get(id=docs[0].id).name, 'foo1')
+
+    def test_chunk_errors(self):
+        User(email='a@example.com').save()
+        users = [User(email='%s@example.com' % c) for c in 'bcad']
+        result = User.objects.bulk_insert(users, chunk_size=2)
+        self.assertEqual(result['inserted'], 3)
+        self.assertEqual(result['errors'], 1)
+        self.assertEqual([offset for offset, error in
+                          result['chunk_errors']], [2])
+
+    def test_conflict(self):
+        User(email='a@example.com').save()
+        born_date = datetime.date(1980, 1, 1)
+        users = [User(email='a@example.com', born_date=born_date)]
+        result = User.objects.bulk_insert(users, conflict='update',
+                                          return_changes=True)
+        self.assertEqual(result['replaced'], 1)
+        self.assertEqual(result['changes'][0]['new_val']['born_date'],
+                         '1980-01-01')
+        self.assertEqual(User.objects.get(email='a@example.com').born_date,
+                         born_date)
+
+    def test_invalid_documents(self):
+        docs = [Foo(name='foo1'), Foo(name=2), Foo(name='foo3')]
+        result = Foo.objects.bulk_insert(docs)
+        self.assertEqual(result['inserted'], 2)
+        self.assertEqual([(index, name) for index, name, message in
+                          result['invalid']], [(1, 'name')])
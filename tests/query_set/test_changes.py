@@ -0,0 +1,65 @@
+from .. import Foo
+from rethinkengine.errors import InvalidQueryError
+
+import threading
+import unittest2 as unittest
+
+
+class ChangesTestCase(unittest.TestCase):
+    def setUp(self):
+        Foo.objects.all().delete()
+        Foo(name='foo1', number=1).save()
+
+    def test_initial_and_update(self):
+        feed = Foo.objects.filter(name='foo1').changes(include_initial=True)
+        event = feed.next()
+        self.assertEqual(event.type, 'initial')
+        self.assertIsNone(event.old)
+        self.assertEqual(event.new.number, 1)
+
+        event.new.number = 2
+        event.new.save()
+        old, new = feed.next()
+        self.assertEqual((old.number, new.number), (1, 2))
+        feed.close()
+
+    def test_insert_and_delete(self):
+        feed = Foo.objects.changes()
+        foo = Foo(name='foo2', number=2)
+        # The feed is opened on the first next(), so write from a timer
+        threading.Timer(0.5, foo.save).start()
+        event = feed.next()
+        self.assertEqual(event.type, 'insert')
+        self.assertEqual(event.new.name, 'foo2')
+
+        foo.delete()
+        event = feed.next()
+        self.assertEqual(event.type, 'delete')
+        self.assertEqual(event.old.name, 'foo2')
+        feed.close()
+
+    def test_order_by(self):
+        # Without a limit the ordering does not change which documents are
+        # watched and is left out of the feed
+        feed = Foo.objects.order_by('number').changes()
+        threading.Timer(0.5, Foo(name='foo2', number=2).save).start()
+        event = feed.next()
+        self.assertEqual(event.type, 'insert')
+        self.assertEqual(event.new.name, 'foo2')
+        feed.close()
+
+    def test_skip(self):
+        feed = Foo.objects.skip(1).changes()
+        self.assertRaises(InvalidQueryError, feed.next)
+
+    def test_limit(self):
+        feed = Foo.objects.order_by('id').limit(5).changes(
+            include_initial=True)
+        event = feed.next()
+        self.assertEqual(event.type, 'initial')
+        self.assertEqual(event.new.name, 'foo1')
+        feed.close()
+
+    def test_limit_without_index(self):
+        feed = Foo.objects.order_by('name').limit(5).changes()
+        self.assertRaises(InvalidQueryError, feed.next)
@@ -34,3 +34,13 @@ class DeleteTestCase(unittest.TestCase):
         objs.next()
         objs.delete()
         self.assertEqual(len(Foo.objects.all()), 0)
+
+    def test_delete_queryset_filter(self):
+        deleted = Foo.objects.filter(name__in=['foo1', 'foo2']).delete()
+        self.assertEqual(deleted, 2)
+        self.assertEqual(len(Foo.objects.all()), 1)
+
+    def test_delete_queryset_signals(self):
+        deleted = Foo.objects.filter(name='foo1').delete(signals=True)
+        self.assertEqual(deleted, 1)
+        self.assertEqual(len(Foo.objects.all()), 2)
@@ -45,3 +45,7 @@ class FilterTestCase(unittest.TestCase):
         self.assertEqual(len(f), 1)
         f = Foo.objects.filter(lambda i: r.expr(["Jack", "Jill"]).contains(i["name"]))
         self.assertEqual(len(f), 2)
+
+    def test_filter_in(self):
+        f = Foo.objects.filter(name__in=['Jack', 'Jill', 'Jane'])
+        self.assertEqual(len(f), 2)
@@ -1,4 +1,4 @@
-from .. import Foo
+from .. import Foo, User
 
 import unittest2 as unittest
 
@@ -6,6 +6,7 @@ import unittest2 as unittest
 class GetTestCase(unittest.TestCase):
     def setUp(self):
         Foo.objects.delete()
+        User.objects.delete()
 
         Foo(name='foo').save()
         Foo(name='foo').save()
@@ -22,3 +23,30 @@ class GetTestCase(unittest.TestCase):
     def test_get_one(self):
         f = Foo.objects.get(name='foo1')
         self.assertIsInstance(f, Foo)
+
+    def test_get_pk(self):
+        f = Foo.objects.get(name='foo1')
+        self.assertEqual(Foo.objects.get(id=f.id).name, 'foo1')
+
+    def test_get_pk_none(self):
+        with self.assertRaises(Foo.DoesNotExist):
+            Foo.objects.get(id='cdc14784-3327-492b-a1db-ad8a3b8abcef')
+
+    def test_get_pk_alias(self):
+        User(email='contact@example.com').save()
+        u = User.objects.get(email='contact@example.com')
+        self.assertEqual(u.id, 'contact@example.com')
+        u = User.objects.get(id='contact@example.com')
+        self.assertEqual(u.email, 'contact@example.com')
+
+    def test_first_pk(self):
+        f = Foo.objects.get(name='foo1')
+        self.assertEqual(Foo.objects.first(id=f.id).id, f.id)
+        self.assertIsNone(
+            Foo.objects.first(id='cdc14784-3327-492b-a1db-ad8a3b8abcef'))
+
+    def test_filter_pk_in(self):
+        ids = [f.id for f in Foo.objects.filter(name='foo')]
+        self.assertEqual(len(Foo.objects.filter(id__in=ids)), 2)
+        self.assertEqual(len(Foo.objects.filter(id__in=ids, name='foo1')), 0)
+        self.assertEqual(len(Foo.objects.filter(id__in=[])), 0)
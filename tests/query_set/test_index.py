@@ -0,0 +1,96 @@
+from rethinkengine.connection import connect
+from rethinkengine.document import Document
+from rethinkengine.fields import *
+
+import unittest2 as unittest
+
+
+class Player(Document):
+    name = StringField()
+    score = IntegerField()
+    team = StringField()
+
+
+class IndexTestCase(unittest.TestCase):
+    def setUp(self):
+        connect('test')
+        Player.table_create()
+        Player.index_create('score')
+        Player.index_create('team')
+        Player.index_wait('score')
+        Player.index_wait('team')
+
+        Player(name='Jack', score=10, team='red').save()
+        Player(name='Jill', score=20, team='blue').save()
+        Player(name='John', score=30, team='red').save()
+
+    def tearDown(self):
+        Player.table_drop()
+
+    def test_get_all(self):
+        f = Player.objects.filter(team='red')
+        self.assertIn('get_all', str(f._build_query()))
+        self.assertEqual(len(f), 2)
+
+    def test_get_all_in(self):
+        f = Player.objects.filter(team__in=['red', 'blue'])
+        self.assertIn('get_all', str(f._build_query()))
+        self.assertEqual(len(f), 3)
+
+    def test_residual_filter(self):
+        f = Player.objects.filter(team='red', name='John')
+        self.assertEqual(len(f), 1)
+
+    def test_between(self):
+        f = Player.objects.filter(score__gt=10, score__lte=30)
+        self.assertIn('between', str(f._build_query()))
+        self.assertEqual(len(f), 2)
+        self.assertEqual(len(Player.objects.filter(score__gte=10,
+                                                   score__lt=30)), 2)
+
+    def test_between_ordered(self):
+        f = Player.objects.filter(score__gte=20).order_by('-score')
+        self.assertEqual([p.name for p in f], ['John', 'Jill'])
+
+    def test_order_by_index(self):
+        f = Player.objects.order_by('-score')
+        self.assertEqual([p.name for p in f], ['John', 'Jill', 'Jack'])
+
+    def test_order_by_unset_field(self):
+        # Secondary indexes don't store None, the document must not be lost
+        Player(name='Jane', team='blue').save()
+        f = Player.objects.order_by('score')
+        self.assertNotIn('index', str(f._build_query()))
+        self.assertEqual(len(list(f)), 4)
+        self.assertEqual(len(list(Player.objects.filter(score__gte=10)
+                                  .order_by('score'))), 3)
+
+    def test_range_without_index(self):
+        f = Player.objects.filter(name__gt='Jack').order_by('name')
+        self.assertEqual([p.name for p in f], ['Jill', 'John'])
+
+    def test_get_all_none(self):
+        # None is not in the index, the lookup is left to the filter
+        Player(name='Jane', score=40).save()
+        f = Player.objects.filter(team=None)
+        self.assertNotIn('get_all', str(f._build_query()))
+        self.assertEqual([p.name for p in f], ['Jane'])
+        f = Player.objects.filter(team__in=[None, 'blue'])
+        self.assertEqual(len(f), 2)
+
+    def test_multi_index_not_used(self):
+        # A multi index matches the elements of a list, not the list
+        class Team(Document):
+            members = ListField()
+
+        Team.table_create()
+        try:
+            Team.index_create('members', mutil=True)
+            Team.index_wait('members')
+            Team(members=['Jack', 'Jill']).save()
+            f = Team.objects.filter(members=['Jack', 'Jill'])
+            self.assertNotIn('get_all', str(f._build_query()))
+            self.assertEqual(len(f), 1)
+            self.assertEqual(len(Team.objects.filter(members=['Jack'])), 0)
+        finally:
+            Team.table_drop()
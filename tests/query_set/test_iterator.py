@@ -0,0 +1,44 @@
+from .. import Foo
+from rethinkengine.connection import get_pool
+
+import time
+import unittest2 as unittest
+
+
+class IteratorTestCase(unittest.TestCase):
+    def setUp(self):
+        Foo.objects.delete()
+        Foo.objects.insert([Foo(name='foo%02d' % i, number=i)
+                            for i in range(25)])
+
+    def test_iterator(self):
+        names = [f.name for f in Foo.objects.order_by('name').iterator()]
+        self.assertEqual(names, ['foo%02d' % i for i in range(25)])
+
+    def test_batch_size(self):
+        f = Foo.objects.order_by('number')
+        numbers = [i.number for i in f.iterator(batch_size=4)]
+        self.assertEqual(numbers, range(25))
+        self.assertIsNone(f._result_cache)
+
+    def test_prefetch(self):
+        f = Foo.objects.filter(number__gte=5).order_by('number')
+        numbers = [i.number for i in f.iterator(batch_size=3, prefetch=2)]
+        self.assertEqual(numbers, range(5, 25))
+
+    def test_max_batch_bytes(self):
+        docs = list(Foo.objects.iterator(batch_size=10, max_batch_bytes=64))
+        self.assertEqual(len(docs), 25)
+
+    def test_stop_early_releases_connection(self):
+        pool = get_pool()
+        for prefetch in (0, 2):
+            it = Foo.objects.iterator(batch_size=5, prefetch=prefetch)
+            it.next()
+            it.close()
+        # The prefetching thread stops within its put() timeout
+        for i in range(20):
+            if not pool._in_use:
+                break
+            time.sleep(0.05)
+        self.assertEqual(pool._in_use, {})
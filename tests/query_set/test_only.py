@@ -0,0 +1,70 @@
+from rethinkengine.connection import connect
+from rethinkengine.document import Document
+from rethinkengine.fields import *
+from rethinkengine.query_set import InvalidQueryError
+
+import unittest2 as unittest
+
+
+class Page(Document):
+    title = StringField()
+    body = StringField()
+    tags = ListField()
+
+
+class OnlyTestCase(unittest.TestCase):
+    def setUp(self):
+        connect('test')
+        Page.table_create()
+
+        Page(title='Page 1', body='Lorem ipsum', tags=['a']).save()
+
+    def tearDown(self):
+        Page.table_drop()
+
+    def test_only(self):
+        p = Page.objects.only('title').first()
+        self.assertEqual(p._data.get('body'), None)
+        self.assertEqual(p._loaded_fields, set(['id', 'title']))
+        self.assertIsNotNone(p.id)
+        self.assertEqual(p.title, 'Page 1')
+
+    def test_defer(self):
+        p = Page.objects.defer('body').first()
+        self.assertEqual(p._data.get('body'), None)
+        self.assertEqual(p.title, 'Page 1')
+        self.assertEqual(p.tags, ['a'])
+
+    def test_only_pk(self):
+        pk = Page.objects.first().id
+        p = Page.objects.only('title').get(id=pk)
+        self.assertEqual(p._data.get('body'), None)
+        self.assertEqual(p.title, 'Page 1')
+
+    def test_load_deferred(self):
+        p = Page.objects.only('title').first()
+        self.assertEqual(p.body, 'Lorem ipsum')
+        self.assertIsNone(p._loaded_fields)
+        self.assertEqual(p.tags, ['a'])
+
+    def test_save_partial(self):
+        p = Page.objects.only('title').first()
+        p.title = 'Page 2'
+        p.save()
+        self.assertIsNotNone(p._loaded_fields)
+        p = Page.objects.first()
+        self.assertEqual(p.title, 'Page 2')
+        self.assertEqual(p.body, 'Lorem ipsum')
+        self.assertEqual(p.tags, ['a'])
+
+    def test_load_keeps_changes(self):
+        p = Page.objects.only('title').first()
+        p.body = 'Dolor'
+        self.assertEqual(p.tags, ['a'])
+        self.assertEqual(p.body, 'Dolor')
+
+    def test_invalid(self):
+        with self.assertRaises(InvalidQueryError):
+            Page.objects.only('doesnotexist')
+        with self.assertRaises(InvalidQueryError):
+            Page.objects.defer('id')
@@ -0,0 +1,33 @@
+from .. import Foo
+from rethinkengine.connection import checkout
+
+import rethinkdb as r
+import unittest2 as unittest
+
+
+class QueryTestCase(unittest.TestCase):
+    def setUp(self):
+        Foo.objects.delete()
+
+        Foo(name='foo1', number=1).save()
+        Foo(name='foo2', number=2).save()
+
+    def test_query(self):
+        query = Foo.objects.filter(number__gt=1).query
+        self.assertIsInstance(query, r.RqlQuery)
+        with checkout() as conn:
+            rows = list(query.run(conn))
+        self.assertEqual([row['name'] for row in rows], ['foo2'])
+
+    def test_hydrate(self):
+        qs = Foo.objects.order_by('name')
+        with checkout() as conn:
+            docs = qs.hydrate(qs.query.run(conn))
+        self.assertEqual([f.name for f in docs], ['foo1', 'foo2'])
+        self.assertIsInstance(docs[0], Foo)
+        self.assertFalse(docs[0]._dirty)
+
+    def test_query_does_not_read_indexes(self):
+        Foo._index_cache = None
+        Foo.objects.filter(name='foo1').order_by('number').query
+        self.assertIsNone(Foo._index_cache)
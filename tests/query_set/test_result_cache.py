@@ -0,0 +1,62 @@
+from .. import Foo
+
+import unittest2 as unittest
+
+
+class ResultCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        Foo.objects.delete()
+
+        Foo(name='foo1').save()
+        Foo(name='foo2').save()
+        Foo(name='foo3').save()
+
+    def test_iterate_twice(self):
+        f = Foo.objects.order_by('name')
+        self.assertEqual([i.name for i in f], ['foo1', 'foo2', 'foo3'])
+        self.assertEqual([i.name for i in f], ['foo1', 'foo2', 'foo3'])
+
+    def test_cache_reused(self):
+        f = Foo.objects.order_by('name')
+        self.assertTrue(f)
+        # Changes in the database aren't seen by a filled cache
+        Foo(name='foo4').save()
+        self.assertEqual(len(f), 3)
+        self.assertEqual(f[0].name, 'foo1')
+        self.assertEqual([i.name for i in f[1:]], ['foo2', 'foo3'])
+        self.assertEqual(len(list(f)), 3)
+
+    def test_bool(self):
+        self.assertTrue(Foo.objects.all())
+        self.assertFalse(Foo.objects.filter(name='bar'))
+
+    def test_cache_cleared(self):
+        f = Foo.objects.all()
+        list(f)
+        f.filter(name='foo1')
+        self.assertEqual(len(f), 1)
+        self.assertEqual(len(list(f)), 1)
+
+    def test_delete_clears_cache(self):
+        f = Foo.objects.all()
+        list(f)
+        f.delete()
+        self.assertEqual(len(f), 0)
+        self.assertFalse(f)
+
+    def test_delete_signals_clears_cache(self):
+        f = Foo.objects.filter(name='foo1')
+        self.assertEqual(len(f), 1)
+        self.assertEqual(f.delete(signals=True), 1)
+        self.assertEqual(len(f), 0)
+        self.assertFalse(f)
+
+    def test_update_signals_clears_cache(self):
+        f = Foo.objects.filter(name='foo1')
+        self.assertTrue(f)
+        f.update(signals=True, number=5)
+        self.assertEqual(f[0].number, 5)
+
+    def test_repr(self):
+        self.assertEqual(repr(Foo.objects.order_by('name')[:1]),
+                         '[<Foo object>]')
@@ -0,0 +1,50 @@
+from rethinkengine.connection import connect
+from rethinkengine.document import Document
+from rethinkengine.fields import *
+from rethinkengine.query_set import InvalidQueryError
+
+import unittest2 as unittest
+
+
+class Author(Document):
+    name = StringField()
+
+
+class Post(Document):
+    title = StringField()
+    author = ReferenceField(Author)
+
+
+class SelectRelatedTestCase(unittest.TestCase):
+    def setUp(self):
+        connect('test')
+        Author.table_create()
+        Post.table_create()
+
+        self.john = Author(name='John')
+        self.john.save()
+        jane = Author(name='Jane')
+        jane.save()
+
+        Post(title='Post 1', author=self.john).save()
+        Post(title='Post 2', author=self.john).save()
+        Post(title='Post 3', author=jane).save()
+        Post(title='Post 4').save()
+
+    def tearDown(self):
+        Post.table_drop()
+        Author.table_drop()
+
+    def test_select_related(self):
+        posts = Post.objects.select_related('author').order_by('title')
+        authors = [p.author.name if p.author else None for p in posts]
+        self.assertEqual(authors, ['John', 'John', 'Jane', None])
+
+    def test_select_related_all(self):
+        post = Post.objects.select_related().get(title='Post 1')
+        self.assertIsInstance(post.author, Author)
+        self.assertEqual(post.author.id, self.john.id)
+
+    def test_select_related_invalid(self):
+        with self.assertRaises(InvalidQueryError):
+            Post.objects.select_related('title')
@@ -2,6 +2,7 @@ from .. import Foo, DB_NAME
 from rethinkengine.fields import *
 from rethinkengine.connection import connect, disconnect, ConnectionError
 from rethinkengine.document import Document
+from rethinkengine.query_set import QuerySet
 
 import rethinkdb as r
 import unittest2 as unittest
@@ -54,3 +55,35 @@ class SliceTestCase(unittest.TestCase):
         f.next()
         # [0] should still refer to the first element
         self.assertEqual(f[0].name, 'foo1')
+
+    def test_slice_is_lazy(self):
+        f = Foo.objects.order_by('name')[1:3]
+        self.assertIsInstance(f, QuerySet)
+        self.assertEqual([i.name for i in f], ['foo2', 'foo3'])
+
+    def test_slice_of_slice(self):
+        f = Foo.objects.order_by('name')[1:][:1]
+        self.assertEqual([i.name for i in f], ['foo2'])
+
+    def test_slice_after_skip(self):
+        f = Foo.objects.order_by('name').skip(1)[1:]
+        self.assertEqual([i.name for i in f], ['foo3'])
+
+    def test_slice_beyond_limit(self):
+        f = Foo.objects.order_by('name').limit(2)[1:5]
+        self.assertEqual(len(f), 1)
+
+    def test_empty_slice(self):
+        self.assertEqual(len(Foo.objects.all()[2:1]), 0)
+
+    def test_negative_index_with_order(self):
+        self.assertEqual(Foo.objects.order_by('name')[-1].name, 'foo3')
+        self.assertEqual(Foo.objects.order_by('-name')[-1].name, 'foo1')
+
+    def test_negative_index_out_of_range(self):
+        with self.assertRaises(IndexError):
+            Foo.objects.order_by('name')[-4]
+
+    def test_negative_slice(self):
+        f = Foo.objects.order_by('name')[-2:]
+        self.assertEqual([i.name for i in f], ['foo2', 'foo3'])
@@ -0,0 +1,58 @@
+from .. import Foo
+from rethinkengine.errors import InvalidQueryError, ValidationError, \
+    RqlOperationError
+
+import rethinkdb as r
+import unittest2 as unittest
+
+
+class UpdateTestCase(unittest.TestCase):
+    def setUp(self):
+        Foo.objects.delete()
+
+        Foo(name='foo1', number=1).save()
+        Foo(name='foo2', number=2).save()
+        Foo(name='foo3', number=3).save()
+
+    def test_update_all(self):
+        updated = Foo.objects.all().update(number=42)
+        self.assertEqual(updated, 3)
+        self.assertEqual(len(Foo.objects.filter(number=42)), 3)
+
+    def test_update_filter(self):
+        updated = Foo.objects.filter(number__gte=2).update(name='bar')
+        self.assertEqual(updated, 2)
+        self.assertEqual(Foo.objects.get(number=1).name, 'foo1')
+
+    def test_update_expression(self):
+        Foo.objects.all().update(number=r.row['number'] + 10)
+        self.assertEqual(Foo.objects.get(name='foo3').number, 13)
+
+    def test_update_signals(self):
+        updated = Foo.objects.filter(name='foo1').update(signals=True,
+                                                         number=10)
+        self.assertEqual(updated, 1)
+        self.assertEqual(Foo.objects.get(name='foo1').number, 10)
+
+    def test_update_signals_expression(self):
+        with self.assertRaises(InvalidQueryError):
+            Foo.objects.all().update(signals=True,
+                                     number=r.row['number'] + 1)
+        self.assertEqual(Foo.objects.get(name='foo1').number, 1)
+
+    def test_update_invalid(self):
+        with self.assertRaises(ValidationError):
+            Foo.objects.all().update(number='foo')
+        with self.assertRaises(InvalidQueryError):
+            Foo.objects.all().update(doesnotexist=1)
+        with self.assertRaises(InvalidQueryError):
+            Foo.objects.all().update(id='foo')
+
+    def test_update_server_validate(self):
+        Foo.objects.filter(name='foo1').update(
+            number=r.row['number'] + 1, server_validate=True)
+        self.assertEqual(Foo.objects.get(name='foo1').number, 2)
+        with self.assertRaises(RqlOperationError):
+            Foo.objects.filter(name='foo1').update(
+                number=r.row['name'], server_validate=True)
+        self.assertEqual(Foo.objects.get(name='foo1').number, 2)
@@ -0,0 +1,51 @@
+from .. import Foo, User
+from rethinkengine.query_set import InvalidQueryError
+
+import datetime
+import unittest2 as unittest
+
+
+class ValuesTestCase(unittest.TestCase):
+    def setUp(self):
+        Foo.objects.delete()
+        User.objects.delete()
+
+        Foo(name='foo1', number=1).save()
+        Foo(name='foo2', number=2).save()
+        User(email='contact@example.com',
+             born_date=datetime.date(2014, 2, 12)).save()
+
+    def test_as_dicts(self):
+        rows = list(Foo.objects.order_by('name').as_dicts())
+        self.assertIsInstance(rows[0], dict)
+        self.assertEqual(rows[0]['name'], 'foo1')
+        self.assertIn('id', rows[0])
+
+    def test_values(self):
+        rows = list(Foo.objects.order_by('name').values('name'))
+        self.assertEqual(rows, [{'name': 'foo1'}, {'name': 'foo2'}])
+
+    def test_values_all_fields(self):
+        row = Foo.objects.filter(name='foo1').values()[0]
+        self.assertEqual(sorted(row.keys()), ['id', 'name', 'number'])
+
+    def test_values_list(self):
+        rows = list(Foo.objects.order_by('name').values_list('name', 'number'))
+        self.assertEqual(rows, [('foo1', 1), ('foo2', 2)])
+
+    def test_values_list_flat(self):
+        rows = list(Foo.objects.order_by('-number').values_list('number',
+                                                                flat=True))
+        self.assertEqual(rows, [2, 1])
+        with self.assertRaises(InvalidQueryError):
+            Foo.objects.values_list('name', 'number', flat=True)
+
+    def test_values_pk(self):
+        rows = list(User.objects.values('id', 'born_date'))
+        self.assertEqual(rows, [{'id': 'contact@example.com',
+                                 'born_date': '2014-02-12'}])
+
+    def test_values_convert(self):
+        born_date = User.objects.values_list('born_date', flat=True,
+                                             convert=True)[0]
+        self.assertEqual(born_date, datetime.date(2014, 2, 12))
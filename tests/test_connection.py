@@ -1,10 +1,12 @@
 from . import DB_NAME
 from random import choice
-from rethinkengine.connection import db_drop, connect, disconnect, get_conn, db_list, ConnectionError
+from rethinkengine.connection import db_drop, connect, disconnect, get_conn, db_list, ConnectionError, \
+    checkout, get_pool
 from string import ascii_letters
 
 import rethinkdb
 import rethinkengine.connection
+import threading
 import unittest2 as unittest
 
 
@@ -83,3 +85,72 @@ class ConnectionTestCase(unittest.TestCase):
         alias = DB_NAME + ''.join(choice(ascii_letters) for i in range(6))
         connect(DB_NAME, alias=alias)
         disconnect(alias)
+
+
+class ConnectionPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.alias = DB_NAME + ''.join(choice(ascii_letters) for i in range(6))
+        connect(DB_NAME, alias=self.alias, min_size=1, max_size=2, timeout=1)
+        self.pool = get_pool(self.alias)
+
+    def tearDown(self):
+        disconnect(self.alias)
+
+    def test_min_size(self):
+        self.assertEqual(len(self.pool._idle), 1)
+
+    def test_checkout(self):
+        with checkout(self.alias) as conn:
+            self.assertIsInstance(conn, rethinkdb.net.Connection)
+            self.assertIsNot(conn, get_conn(self.alias))
+            self.assertEqual(rethinkdb.expr(1).run(conn), 1)
+        self.assertEqual(len(self.pool._idle), 1)
+
+    def test_nested_checkout(self):
+        with checkout(self.alias) as conn1:
+            with checkout(self.alias) as conn2:
+                self.assertIs(conn1, conn2)
+            self.assertEqual(self.pool._size, 1)
+
+    def test_threads(self):
+        conns = []
+
+        def worker():
+            with checkout(self.alias) as conn:
+                conns.append(conn)
+                rethinkdb.expr(1).run(conn)
+
+        with checkout(self.alias) as conn:
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+            self.assertIsNot(conns[0], conn)
+        self.assertEqual(self.pool._size, 2)
+
+    def test_timeout(self):
+        errors = []
+
+        def worker():
+            try:
+                self.pool.acquire()
+            except ConnectionError as e:
+                errors.append(e)
+
+        self.pool.max_size = 1
+        with checkout(self.alias):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+        self.assertEqual(len(errors), 1)
+
+    def test_reconnect(self):
+        with checkout(self.alias) as conn:
+            conn.close()
+        self.assertEqual(self.pool._size, 0)
+        with checkout(self.alias) as conn:
+            self.assertEqual(rethinkdb.expr(1).run(conn), 1)
+
+    def test_closed(self):
+        disconnect(self.alias)
+        self.assertRaises(ConnectionError, self.pool.acquire)
+        connect(DB_NAME, alias=self.alias)
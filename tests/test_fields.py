@@ -59,6 +59,11 @@ class StringFieldTestCase(unittest.TestCase):
         f = StringField()
         self.assertFalse(f.is_valid(123))
 
+    def test_regex(self):
+        f = StringField(regex='^[a-z]+$')
+        self.assertTrue(f.is_valid('foo'))
+        self.assertFalse(f.is_valid('Foo'))
+
 
 class IntegerFieldTestCase(unittest.TestCase):
     def test_default(self):
@@ -82,6 +87,13 @@ class IntegerFieldTestCase(unittest.TestCase):
         f = IntegerField()
         self.assertFalse(f.is_valid('foo'))
 
+    def test_range(self):
+        f = IntegerField(min_value=0, max_value=10)
+        self.assertTrue(f.is_valid(0))
+        self.assertTrue(f.is_valid(10))
+        self.assertFalse(f.is_valid(-1))
+        self.assertFalse(f.is_valid(11))
+
 
 class FloatFieldTestCase(unittest.TestCase):
     def test_default(self):
@@ -100,11 +112,12 @@ class FloatFieldTestCase(unittest.TestCase):
     def test_is_valid(self):
         f = FloatField()
         self.assertTrue(f.is_valid(123.456))
+        self.assertTrue(f.is_valid(0))
 
     def test_wrong_type(self):
         f = FloatField()
         self.assertFalse(f.is_valid('foo'))
-        self.assertFalse(f.is_valid(0))
+        self.assertFalse(f.is_valid(True))
 
 
 class ListFieldTestCase(unittest.TestCase):